@@ -1,16 +1,22 @@
 import customtkinter as ctk
 from tkinter import ttk
-import platform, os, numpy as np
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-import cartopy.crs as ccrs
-import cartopy.feature as cfeature
-from skyfield.api import load, wgs84
-from tleFiles.makeTleFile import makeTle
-from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk
-from visibleSats import calcVisibleSats
+import platform, time, numpy as np
+from datetime import datetime, timezone
+from backgroundTasks import TaskRunner
+from catalog import Catalog
+from searchIndex import SearchIndex
+from virtualTable import VirtualTable
+from refreshProfiler import RefreshProfiler
 import tkinter.messagebox as msgbox
 
+# matplotlib, cartopy ו-skyfield נטענים רק אחרי שהחלון מצויר, ב-startup
+
+SEARCH_DELAY = 150
+STARTUP_DELAY = 50
+PLAYBACK_INTERVAL = 40
+# כמה זמן לפני סוף חלון של ה-cache מתחילים לבנות ברקע את הטבלאות של הבא (ימים)
+PREFETCH_AHEAD = 15 / 1440
+
 
 class Simulator(ctk.CTk):
     def __init__(self):
@@ -28,7 +34,53 @@ class Simulator(ctk.CTk):
         style.configure("Treeview.Heading", background="#565b5e", foreground="white", relief="flat")
 
         self.selectedPoint = None
+        self.mapRenderer = None
+        self.playback = None
+        self.tleFetcher = None
+        self.tasks = TaskRunner(self)
+        self.profiler = RefreshProfiler()
+        self.lastStatsUpdate = 0.0
         self.create_widgets()
+        self.after(STARTUP_DELAY, self.startup)
+
+    def startup(self):
+        from ephemerisCache import EphemerisCache
+        from groundTrack import GroundTracks
+        from sharedTime import timescale
+        from tleFetcher import TleFetcher
+        from tleStore import TleStore
+
+        ts = timescale()
+        self.ephemerisCache = EphemerisCache(ts)
+        self.tleStore = TleStore(ts)
+        # fetcher אחד לכל הריצה, כדי שחיבורי keep-alive ישמשו גם ברענון הבא
+        self.tleFetcher = TleFetcher(self.tleStore)
+        self.groundTracks = GroundTracks(ts)
+
+        # ה-TLE נטענים ב-thread רקע בזמן שהמפה נבנית
+        self.loadSatellites(self.tableChoice.get())
+        self.prefetchGroups(self.tableChoice.get())
+        self.createMap()
+        self.startAutoUpdate()
+
+    def createMap(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        import cartopy.crs as ccrs
+        from mapRenderer import MapRenderer
+
+        self.fig = Figure(figsize=(10, 5))
+        self.ax = self.fig.add_subplot(1, 1, 1, projection=ccrs.PlateCarree())
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.mapFrame)
+        toolbar = NavigationToolbar2Tk(self.canvas, self.mapFrame, pack_toolbar=False)
+        toolbar.pack(side="top", fill="x", before=self.mapPlaceholder)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True, before=self.mapPlaceholder)
+        self.mapPlaceholder.destroy()
+        self.canvas.mpl_connect("button_press_event", self.onRightClick)
+        self.canvas.mpl_connect("pick_event", self.onPick)
+
+        self.mapRenderer = MapRenderer(self.ax, self.canvas)
+        self.drawMap()
 
     def create_widgets(self):
         mainFrame = ctk.CTkFrame(self)
@@ -38,17 +90,12 @@ class Simulator(ctk.CTk):
 
         mapFrame = ctk.CTkFrame(mainFrame)
         mapFrame.grid(row=0, column=0, sticky="nsew")
+        self.mapFrame = mapFrame
 
-        self.fig = plt.Figure(figsize=(10, 5))
-        self.ax = self.fig.add_subplot(1, 1, 1, projection=ccrs.PlateCarree())
-        self.canvas = FigureCanvasTkAgg(self.fig, master=mapFrame)
-        self.canvas.draw()
-        toolbar = NavigationToolbar2Tk(self.canvas, mapFrame)
-        toolbar.pack(side="top", fill="x")
-        self.canvas.get_tk_widget().pack(fill="both", expand=True)
-        self.canvas.mpl_connect("button_press_event", self.onRightClick)
-
-        self.drawMap()
+        # המפה עצמה נבנית ב-createMap; עד אז מקום שמור באותו גודל
+        self.mapPlaceholder = ctk.CTkLabel(mapFrame, text="Loading map...")
+        self.mapPlaceholder.pack(fill="both", expand=True)
+        self.plottedIds = []
 
         self.latChoice = ctk.CTkEntry(mapFrame, placeholder_text="Lat", width=250)
         self.latChoice.pack(padx=2, pady=5, side="left")
@@ -69,6 +116,39 @@ class Simulator(ctk.CTk):
 
         self.calcVisibleBtn = ctk.CTkButton(mapFrame, text="export visible sats excel", command=self.calcVisibleSatsChoice)
         self.calcVisibleBtn.pack(pady=5, padx=5)
+        self.trackHorizon = ctk.CTkEntry(mapFrame, placeholder_text="Track minutes (720)", width=200)
+        self.trackHorizon.pack(padx=5, pady=5)
+        self.showTracksBtn = ctk.CTkButton(mapFrame, text="Show selected tracks", command=self.onShowTracks)
+        self.showTracksBtn.pack(pady=5, padx=5)
+        self.statusLabel = ctk.CTkLabel(mapFrame, text="")
+        self.statusLabel.pack(pady=5, padx=5)
+        self.profileBtn = ctk.CTkButton(mapFrame, text="Profile refresh", command=self.onProfile)
+        self.profileBtn.pack(pady=5, padx=5)
+        self.statsLabel = ctk.CTkLabel(mapFrame, text="", font=("Courier", 11))
+        self.statsLabel.pack(pady=5, padx=5)
+
+        # ניגון חלון זמן מחושב מראש במקום מיקומים בזמן אמת
+        playbackFrame = ctk.CTkFrame(mapFrame)
+        playbackFrame.pack(fill="x", padx=5, pady=5)
+        self.playStart = ctk.CTkEntry(playbackFrame, placeholder_text="Start UTC (YYYY-MM-DD HH:MM)", width=220)
+        self.playStart.pack(side="left", padx=2)
+        self.playHours = ctk.CTkEntry(playbackFrame, placeholder_text="Hours (24)", width=90)
+        self.playHours.pack(side="left", padx=2)
+        self.playSpeed = ctk.CTkEntry(playbackFrame, placeholder_text="Speed (1000)", width=90)
+        self.playSpeed.pack(side="left", padx=2)
+        self.playStep = ctk.CTkEntry(playbackFrame, placeholder_text="Step sec (60)", width=90)
+        self.playStep.pack(side="left", padx=2)
+        self.playBtn = ctk.CTkButton(playbackFrame, text="Play", width=70, command=self.onPlay)
+        self.playBtn.pack(side="left", padx=2)
+        self.liveBtn = ctk.CTkButton(playbackFrame, text="Live", width=70, command=self.onLive)
+        self.liveBtn.pack(side="left", padx=2)
+        self.openEphemerisBtn = ctk.CTkButton(playbackFrame, text="Open .eph", width=80, command=self.onOpenEphemeris)
+        self.openEphemerisBtn.pack(side="left", padx=2)
+        self.playSlider = ctk.CTkSlider(playbackFrame, from_=0, to=1, command=self.onScrub)
+        self.playSlider.set(0)
+        self.playSlider.pack(side="left", fill="x", expand=True, padx=5)
+        self.clockLabel = ctk.CTkLabel(playbackFrame, text="live")
+        self.clockLabel.pack(side="left", padx=5)
 
         rightFrame = ctk.CTkFrame(mainFrame)
         rightFrame.grid(row=0, column=1, sticky="nsew", padx=10, pady=10)
@@ -77,7 +157,7 @@ class Simulator(ctk.CTk):
         self.searchSat.pack(fill="x", pady=(0, 5))
         self.searchSat.bind("<KeyRelease>", self.onSearch)
 
-        tablesValues = ["Gnss", "Gps", "Beidou", "Cosmos", "Constellation"]
+        tablesValues = ["Gnss", "Gps", "Beidou", "Cosmos", "All", "Constellation"]
         self.tableChoice = ctk.StringVar(value="Gnss")
         self.tableOptions = ctk.CTkOptionMenu(rightFrame, variable=self.tableChoice, values=tablesValues, command=self.onChoice)
         self.tableOptions.pack(fill="x", pady=(0, 5))
@@ -90,148 +170,294 @@ class Simulator(ctk.CTk):
         self.updateTime = ctk.CTkEntry(rightFrame, width=200)
         self.updateTime.pack(pady=(5, 0))
 
-        self.selectedNames = set()
-        self.satellites = self.downloadTleData(self.tableChoice.get())
-        self.filteredSatellites = self.satellites
-        self.updateTable(self.table, self.satellites)
-        self.startAutoUpdate()
+        # כל הלוויינים במערכים של Catalog; הטבלה מציגה רק view של ids מסוננים
+        self.catalog = Catalog([], [], [], [])
+        self.filtered = self.catalog.view()
+        self.searchIndex = SearchIndex(self.catalog)
+        self.searchJob = None
 
     def createTable(self, parent, title, columns, command):
         label = ctk.CTkLabel(parent, textvariable=title)
         label.pack(fill="x")
 
-        table = ttk.Treeview(parent, columns=columns, show="headings")
-        for col in columns:
-            table.heading(col, text=col)
+        table = VirtualTable(parent, columns, self.rowValues, self.rowTags)
+        table.tree.tag_configure("selected", background="#22559b")
         table.pack(fill="both", expand=True)
-        table.bind("<Double-1>", lambda event: self.onSatClick(event, table))
+        table.tree.bind("<Double-1>", lambda event: self.onSatClick(event, table))
 
         button = ctk.CTkButton(parent, text="Select All", command=lambda: command(table))
         button.pack(fill="x", pady=(5, 0))
         return table
 
+    def rowValues(self, index):
+        return (index + 1, self.filtered.name(index))
+
+    def rowTags(self, index):
+        return ("selected",) if self.filtered.isSelected(index) else ()
+
     def onChoice(self, choice):
-        self.satellites = self.downloadTleData(choice)
-        self.filteredSatellites = self.satellites
-        self.updateTable(self.table, self.filteredSatellites)
+        self.loadSatellites(choice)
+
+    def loadSatellites(self, choice):
+        self.setStatus(f"Loading {choice}...")
+        self.tasks.submit("tle", lambda task: self.prepareSatellites(choice), onDone=self.onSatellitesLoaded, onError=self.onTaskError)
+
+    def prefetchGroups(self, choice):
+        from tleStore import GROUPS
+
+        # שאר הקבוצות יורדות במקביל ברקע, כך שמעבר ביניהן לא מחכה לרשת
+        others = [group for group in GROUPS if group != choice]
+        self.tasks.submit("prefetch", lambda task: self.tleFetcher.run(others))
+
+    def prepareSatellites(self, choice):
+        # גם הקטלוג והאינדקס לחיפוש נבנים ב-thread הרקע
+        catalog = self.downloadTleData(choice)
+        return catalog, SearchIndex(catalog)
+
+    def onSatellitesLoaded(self, result):
+        self.setStatus("")
+        catalog, self.searchIndex = result
+        self.stopPlayback()
+        # הבחירה עוברת בין קבוצות לפי מספר NORAD, כמו שקודם עברה לפי שם
+        catalog.selected = np.isin(catalog.satnums, self.catalog.satnums[self.catalog.selected])
+        self.catalog = catalog
+        self.filtered = self.catalog.view()
+        self.updateTable(self.table, self.filtered)
+        self.plotSats()
+
+    def setStatus(self, text):
+        self.statusLabel.configure(text=text)
+
+    def onTaskError(self, error):
+        self.setStatus("")
+        msgbox.showerror("Error", str(error))
 
     def downloadTleData(self, choice):
-        urls = {"Gnss": "gnss", "Gps": "gps-ops", "Beidou": "beidou", "Cosmos": "musson"}
         if choice == "Constellation":
-            makeTle()
-            satellites = load.tle_file("tleFiles/constellation.txt")
-        else:
-            os.makedirs("tleFiles", exist_ok=True)
-            tleUrl = f"http://www.celestrak.org/NORAD/elements/gp.php?GROUP={urls[choice]}&FORMAT=tle"
-            satellites = load.tle_file(tleUrl, filename=f"tleFiles/{choice}.txt")
-        return satellites
+            from tleFiles.makeTleFile import makeSatrecs
 
-    def updateTable(self, table, satellites):
-        table.delete(*table.get_children())
+            # הלוויינים נבנים ישירות כ-Satrec, בלי לכתוב ולקרוא קובץ TLE
+            satrecs = makeSatrecs()
+            return Catalog.fromSatrecs(satrecs, [f"Ben-{i + 1}" for i in range(len(satrecs))])
+        if choice == "All":
+            # כל הקבוצות בקטלוג אחד, לוויין אחד לכל מספר NORAD
+            self.tleFetcher.run()
+            return Catalog.fromSatellites(self.tleStore.loadMerged())
+        return Catalog.fromSatellites(self.tleStore.load(choice))
 
-        for i, sat in enumerate(satellites):
-            item_id = table.insert("", "end", values=(i + 1, sat.name))
-            if sat.name in self.selectedNames:
-                table.item(item_id, tags=("selected",))
-
-        table.tag_configure("selected", background="#22559b")
-        self.plotSats()
+    def updateTable(self, table, view):
+        table.setCount(len(view))
 
     def onSearch(self, event):
+        # מחכים שההקלדה תיעצר לפני שמחפשים
+        if self.searchJob is not None:
+            self.after_cancel(self.searchJob)
+        self.searchJob = self.after(SEARCH_DELAY, self.applySearch)
+
+    def applySearch(self):
+        self.searchJob = None
         query = self.searchSat.get().lower()
         if query == "":
-            self.filteredSatellites = self.satellites
+            self.filtered = self.catalog.view()
         else:
-            self.filteredSatellites = [sat for sat in self.satellites if query in sat.name.lower()]
-        self.updateTable(self.table, self.filteredSatellites)
+            self.filtered = self.catalog.view(self.searchIndex.query(query))
+        self.updateTable(self.table, self.filtered)
 
     def onSatClick(self, event, table):
-        item = table.identify_row(event.y)
-        satName = table.item(item, "values")[1]
-
-        if satName in self.selectedNames:
-            self.selectedNames.remove(satName)
-            table.item(item, tags=())
-
+        index = table.indexOf(table.tree.identify_row(event.y))
+        if index is None:
+            return
+        if not self.catalog.toggle(self.filtered[index]):
             self.clearSelection()
-        else:
-            self.selectedNames.add(satName)
-            table.item(item, tags=("selected",))
+        table.render()
         self.plotSats()
 
     def plotSats(self):
-        if hasattr(self, "satArtists") or hasattr(self, "satLabels"):
-            for artist in list(self.satArtists.keys()):
-                try:
-                    artist.remove()
-                except Exception:
-                    pass
-            for label in self.satLabels:
-                try:
-                    label.remove()
-                except Exception:
-                    pass
-
-        ts = load.timescale()
+        if self.mapRenderer is None:
+            return
+        if self.playback is not None:
+            self.plotPlayback()
+            return
+        ts = self.ephemerisCache.ts
         t = ts.now()
 
-        self.satArtists = {}
-        self.satLabels = []
+        with self.profiler.stage("propagation"):
+            ids = self.catalog.selectedIds()
+            group = self.ephemerisCache.catalogGroup(self.catalog, ids)
+            # ב-thread של Tk לא מריצים sgp4: בלי טבלה נשאר הפריים הקודם עד שהיא נבנית ברקע
+            subpoints = group.subpointsAt(t, build=False)
+        if subpoints is None:
+            self.prepareEphemeris(group, t)
+            return
+        lats, lons = subpoints
+        self.plottedIds = ids
+        with self.profiler.stage("artists"):
+            self.mapRenderer.update(lons, lats, self.catalog.names[ids], blit=False)
+        with self.profiler.stage("draw"):
+            self.mapRenderer.blit()
+
+        ahead = ts.tt_jd(t.tt + PREFETCH_AHEAD)
+        if group.missing(ahead):
+            self.prepareEphemeris(group, ahead)
+
+    def prepareEphemeris(self, group, t):
+        # בנייה שכבר רצה לא מבוטלת; כשהיא נגמרת הרענון הבא יבקש את מה שעוד חסר
+        if self.tasks.busy("ephemeris"):
+            return
+        self.tasks.submit("ephemeris", lambda task: group.prepare(t, task), onDone=lambda result: self.plotSats(), onError=self.onTaskError)
+
+    def plotPlayback(self):
+        # בניגון אין חישוב מסלול: רק שליפת שורה מה-memmap ועדכון האמנים
+        with self.profiler.stage("propagation"):
+            frame = self.playback.frame()
+        if frame is None:
+            return
+        index, lats, lons = frame
+        self.plottedIds = self.playback.ids
+        with self.profiler.stage("artists"):
+            self.mapRenderer.update(lons, lats, self.playback.names, blit=False)
+        with self.profiler.stage("draw"):
+            self.mapRenderer.blit()
+        self.playSlider.set(self.playback.clock.fraction)
+        self.clockLabel.configure(text=self.playback.times[index].utc_strftime("%Y-%m-%d %H:%M:%S"))
+
+    def onPlay(self):
+        if self.playback is not None and self.playback.clock.playing:
+            self.playback.clock.pause()
+            self.playBtn.configure(text="Play")
+            return
+        if self.playback is None and not self.startPlayback():
+            return
+        self.playback.clock.play()
+        self.playBtn.configure(text="Pause")
+
+    def startPlayback(self):
+        from playback import Playback
+
+        ids = self.catalog.selectedIds()
+        if len(ids) == 0:
+            msgbox.showerror("Error", "Please select satellites first.")
+            return False
+        try:
+            hours = float(self.playHours.get() or 24)
+            speed = float(self.playSpeed.get() or 1000)
+            step = float(self.playStep.get() or 60)
+            text = self.playStart.get().strip()
+            start = datetime.strptime(text, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc) if text else None
+        except ValueError:
+            msgbox.showerror("Error", "Please enter valid playback data")
+            return False
+        if hours <= 0 or step <= 0:
+            msgbox.showerror("Error", "Hours and step must be positive.")
+            return False
+
+        ts = self.ephemerisCache.ts
+        start = ts.from_datetime(start) if start else ts.now()
+        self.playback = Playback(ts, self.catalog.satrecArray(ids), ids, self.catalog.names[ids], start, hours, speed, step)
+        self.computePlayback()
+        return True
+
+    def onOpenEphemeris(self):
+        from tkinter import filedialog
+        from ephemerisFile import EphemerisFile
+        from playback import Playback
+
+        path = filedialog.askopenfilename(filetypes=[("Ephemeris", "*.eph")])
+        if not path:
+            return
+        try:
+            speed = float(self.playSpeed.get() or 1000)
+            ephemeris = EphemerisFile(path)
+            # לוויינים שאינם בקבוצה הנוכחית מוצגים, אבל בלי מסלול קרקע
+            playback = Playback.fromEphemeris(self.ephemerisCache.ts, ephemeris, self.catalog.idsOf(ephemeris.ids), speed)
+        except ValueError as error:
+            msgbox.showerror("Error", str(error))
+            return
 
-        for sat in self.satellites:
-            if sat.name in self.selectedNames:
-                geo = sat.at(t)
-                subpoint = wgs84.subpoint(geo)
-                lon, lat = subpoint.longitude.degrees, subpoint.latitude.degrees
+        self.stopPlayback()
+        self.playback = playback
+        self.computePlayback()
+        self.playback.clock.play()
+        self.playBtn.configure(text="Pause")
+
+    def computePlayback(self):
+        self.tasks.submit(
+            "playback",
+            self.playback.compute,
+            onDone=lambda playback: self.setStatus(""),
+            onError=self.onTaskError,
+            onProgress=lambda done, total: self.setStatus(f"Precomputing playback {done}/{total}"),
+        )
 
-                artist = self.ax.plot(lon, lat, "bo", markersize=5, picker=5)[0]
-                self.satArtists[artist] = sat
-                label = self.ax.text(lon + 0.5, lat + 0.5, sat.name, fontsize=8, color="black")
-                self.satLabels.append(label)
+    def stopPlayback(self):
+        if self.playback is None:
+            return
+        self.tasks.cancel("playback")
+        self.playback.close()
+        self.playback = None
+        self.playBtn.configure(text="Play")
+        self.playSlider.set(0)
+        self.clockLabel.configure(text="live")
+        self.setStatus("")
+
+    def onLive(self):
+        self.stopPlayback()
+        self.plotSats()
 
-        self.canvas.draw()
-        self.canvas.mpl_connect("pick_event", self.onPick)
+    def onScrub(self, value):
+        if self.playback is not None:
+            self.playback.clock.seek(value)
+            self.plotSats()
 
     def onPick(self, event):
-        artist = event.artist
-        if artist in self.satArtists:
-            sat = self.satArtists[artist]
+        if event.artist is self.mapRenderer.points and len(event.ind) > 0:
+            index = event.ind[0]
+            satId = self.plottedIds[index]
 
             self.clearSelection()
 
-            x, y = artist.get_data()
+            x, y = self.mapRenderer.position(index)
             self.highlight = self.ax.plot(x, y, "o", markersize=18, markeredgecolor="black", markerfacecolor="none")[0]
 
-            # חישוב מסלול עתידי
-            ts = load.timescale()
-            now = ts.now()
-            start = now.utc_datetime()
-            minutes = range(start.minute, start.minute + 12 * 60)
-            times = ts.utc(start.year, start.month, start.day, start.hour, minutes)
-
-            lons, lats = [], []
-            for t in times:
-                geo = sat.at(t)
-                subpoint = wgs84.subpoint(geo)
-                lons.append(subpoint.longitude.degrees)
-                lats.append(subpoint.latitude.degrees)
-
-            lons = np.array(lons)
-            for i in range(1, len(lons)):
-                if lons[i] - lons[i - 1] > 180:
-                    lons[i:] -= 360
-                elif lons[i] - lons[i - 1] < -180:
-                    lons[i:] += 360
-
-            self.trajectory = self.ax.plot(lons, lats, "b-", linewidth=3)[0]
+            self.showTracks([satId])
             self.canvas.draw()
 
-    def onReset(self):
-        self.selectedNames.clear()
-        self.table.selection_remove(*self.table.selection())
+    def onShowTracks(self):
+        self.clearSelection()
+        self.showTracks(self.plottedIds)
 
-        for rowId in self.table.get_children():
-            self.table.item(rowId, tags=())
+    def showTracks(self, ids):
+        # חישוב מסלולים עתידיים ב-thread רקע; בחירה חדשה מבטלת את הקודמת
+        ids = np.asarray(ids)
+        ids = ids[ids >= 0]
+        if len(ids) == 0:
+            return
+        # דרך ה-cache: לחיצה חוזרת על אותו לוויין רק מאנטרפלת מטבלאות קיימות
+        group = self.ephemerisCache.catalogGroup(self.catalog, ids)
+        # בזמן ניגון המסלול מתחיל מהזמן המוצג ולא מעכשיו
+        frame = self.playback.frame() if self.playback is not None else None
+        start = self.playback.times[frame[0]] if frame is not None else None
+        try:
+            horizon = float(self.trackHorizon.get())
+        except ValueError:
+            horizon = None
+
+        self.tasks.submit(
+            "track",
+            lambda task: (len(ids), self.groundTracks.paths(group, start, horizon)),
+            onDone=self.drawTrajectory,
+            onError=self.onTaskError,
+        )
+
+    def drawTrajectory(self, result):
+        count, (lons, lats) = result
+        self.trajectory = self.ax.plot(lons, lats, "b-", linewidth=3 if count == 1 else 1)[0]
+        self.canvas.draw()
+
+    def onReset(self):
+        self.stopPlayback()
+        self.catalog.clearSelection()
+        self.table.render()
 
         self.clearSelection()
         self.selectedPoint = None
@@ -241,34 +467,45 @@ class Simulator(ctk.CTk):
         self.drawMap(preserve_view=False)
 
     def drawMap(self, preserve_view=True):
-        if preserve_view:
-            xlim = self.ax.get_xlim()
-            ylim = self.ax.get_ylim()
-
-        self.ax.clear()
-        self.ax.stock_img()
-        self.ax.coastlines()
-        self.ax.add_feature(cfeature.BORDERS)
-
-        if preserve_view:
-            self.ax.set_xlim(xlim)
-            self.ax.set_ylim(ylim)
-        self.canvas.draw()
+        if self.mapRenderer is None:
+            return
+        self.mapRenderer.drawMap(preserve_view)
 
     def startAutoUpdate(self):
         try:
             interval = int(float(self.updateTime.get()) * 1000)
         except ValueError:
             interval = 2000
+        if interval <= 0:
+            interval = 2000
+        if self.playback is not None and self.playback.clock.playing:
+            interval = PLAYBACK_INTERVAL
 
-        self.updateTable(self.table, self.filteredSatellites)
-        self.after(interval, self.startAutoUpdate)
+        capturing = self.profiler.capturing
+        self.profiler.beginTick()
+        # הטבלה מתעדכנת רק כשהחיפוש, הקבוצה או הבחירה משתנים, לא בכל טיק
+        self.plotSats()
+        # טיק שחרג מהמרווח מדלג על המשבצות שפספס במקום להצטבר
+        delay = self.profiler.endTick(interval)
+        if capturing and not self.profiler.capturing:
+            self.setStatus(f"{self.profiler.captureOutput} created")
+
+        now = time.perf_counter()
+        if now - self.lastStatsUpdate >= 1:
+            self.lastStatsUpdate = now
+            self.statsLabel.configure(text=self.profiler.report())
+        self.after(delay, self.startAutoUpdate)
+
+    def onProfile(self):
+        if self.profiler.capturing:
+            self.profiler.stopCapture()
+        else:
+            self.profiler.startCapture()
+            self.setStatus("profiling the next 20 refreshes -> refreshProfile.txt")
 
     def onSelectAll(self, table):
-        for rowId in table.get_children():
-            satName = table.item(rowId, "values")[1]
-            self.selectedNames.add(satName)
-            table.item(rowId, tags=("selected",))
+        self.filtered.selectAll()
+        table.render()
 
         self.clearSelection()
         self.plotSats()
@@ -281,6 +518,8 @@ class Simulator(ctk.CTk):
     def updatePosition(self, lat, lon):
         self.latChoice.delete(0, "end"), self.latChoice.insert(0, f"{lat:.2f}")
         self.lonChoice.delete(0, "end"), self.lonChoice.insert(0, f"{lon:.2f}")
+        if self.mapRenderer is None:
+            return
 
         if getattr(self, "selectedPointArtist", None) is not None:
             self.selectedPointArtist.remove()
@@ -290,6 +529,9 @@ class Simulator(ctk.CTk):
         self.canvas.draw()
 
     def calcVisibleSatsChoice(self):
+        # ייצוא אחד בכל פעם; לחיצה נוספת בזמן ריצה לא מתחילה אותו מחדש
+        if self.tasks.busy("visible"):
+            return
         try:
             lat = float(self.latChoice.get())
             lon = float(self.lonChoice.get())
@@ -311,22 +553,55 @@ class Simulator(ctk.CTk):
             msgbox.showerror("Error", "Please set a position first.")
             return
 
-        calcVisibleSats(lat, lon, minAngle, maxAngle)
+        from visibleSats import calcVisibleSats
+
+        # הייצוא הוא על הקבוצה שמוצגת כרגע
+        satellites = self.catalog.earthSatellites(self.ephemerisCache.ts)
+        self.calcVisibleBtn.configure(state="disabled")
+        self.tasks.submit(
+            "visible",
+            # בתוך תהליך ה-Tk לא מקימים pool של תהליכים
+            lambda task: calcVisibleSats(lat, lon, minAngle, maxAngle, workers=1, progress=task.progress, satellites=satellites),
+            onDone=self.onVisibleSatsDone,
+            onError=self.onVisibleSatsError,
+            onProgress=self.setStatus,
+        )
+
+    def onVisibleSatsDone(self, result):
+        self.calcVisibleBtn.configure(state="normal")
+        self.setStatus("")
         msgbox.showinfo("Success", "Visible satellites exported to 'visibleSats.csv'")
 
+    def onVisibleSatsError(self, error):
+        self.calcVisibleBtn.configure(state="normal")
+        self.onTaskError(error)
+
     def clearSelection(self):
+        self.tasks.cancel("track")
+        removed = False
         if getattr(self, "trajectory", None) is not None:
             self.trajectory.remove()
             self.trajectory = None
+            removed = True
         if getattr(self, "highlight", None) is not None:
             self.highlight.remove()
             self.highlight = None
+            removed = True
         if getattr(self, "selectedPointArtist", None) is not None:
             self.selectedPointArtist.remove()
             self.selectedPointArtist = None
+            removed = True
 
+        # שכבות סטטיות נשמרות ברקע של ה-blit, לכן צריך ציור מלא כדי שייעלמו
+        if removed:
+            self.canvas.draw_idle()
 
 if __name__ == "__main__":
     app = Simulator()
     app.bind("<Control-w>", lambda event: app.destroy())
     app.mainloop()
+    app.tasks.shutdown()
+    if app.playback is not None:
+        app.playback.close()
+    if app.tleFetcher is not None:
+        app.tleFetcher.close()
@@ -0,0 +1,117 @@
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Task:
+    """Handle passed to a background function for progress and cancellation."""
+
+    def __init__(self, runner, channel, onDone, onError, onProgress):
+        self.runner = runner
+        self.channel = channel
+        self.onDone = onDone
+        self.onError = onError
+        self.onProgress = onProgress
+        self.cancelEvent = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self.cancelEvent.is_set()
+
+    def cancel(self):
+        self.cancelEvent.set()
+
+    def check(self):
+        if self.cancelled:
+            raise Cancelled()
+
+    def progress(self, *values):
+        # נקודת בדיקה טבעית: משימה שבוטלה נעצרת בדיווח ההתקדמות הבא
+        self.check()
+        self.runner.results.put(("progress", self, values))
+
+
+class TaskRunner:
+    """Runs work on a thread pool and delivers results on the Tk main loop.
+
+    Each task belongs to a channel ("tle", "visible", "track", ...); submitting
+    a new task on a channel cancels the previous one and any result it still
+    produces is dropped. Results are picked up by polling a queue with
+    `widget.after`, so callbacks always run on the Tk thread.
+    """
+
+    def __init__(self, widget, workers=2, pollInterval=50):
+        self.widget = widget
+        self.pollInterval = pollInterval
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="simulator")
+        self.results = queue.Queue()
+        self.current = {}
+        self.polling = False
+
+    def submit(self, channel, fn, onDone=None, onError=None, onProgress=None):
+        """Run `fn(task)` in the background; callbacks get its result, error or progress values."""
+        self.cancel(channel)
+        task = Task(self, channel, onDone, onError, onProgress)
+        self.current[channel] = task
+        self.pool.submit(self.run, task, fn)
+        if not self.polling:
+            self.polling = True
+            self.widget.after(self.pollInterval, self.poll)
+        return task
+
+    def cancel(self, channel):
+        task = self.current.pop(channel, None)
+        if task is not None:
+            task.cancel()
+
+    def busy(self, channel):
+        return channel in self.current
+
+    def run(self, task, fn):
+        if task.cancelled:
+            return
+        try:
+            self.results.put(("done", task, fn(task)))
+        except Cancelled:
+            pass
+        except Exception as error:
+            self.results.put(("error", task, error))
+
+    def poll(self):
+        while True:
+            try:
+                kind, task, value = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            # תוצאות של משימה שהוחלפה או בוטלה נזרקות
+            if self.current.get(task.channel) is not task:
+                continue
+            if kind == "progress":
+                if task.onProgress is not None:
+                    task.onProgress(*value)
+                continue
+
+            del self.current[task.channel]
+            if kind == "done" and task.onDone is not None:
+                task.onDone(value)
+            elif kind == "error":
+                if task.onError is not None:
+                    task.onError(value)
+                else:
+                    traceback.print_exception(value)
+
+        if self.current:
+            self.widget.after(self.pollInterval, self.poll)
+        else:
+            self.polling = False
+
+    def shutdown(self):
+        for channel in list(self.current):
+            self.cancel(channel)
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,287 @@
+"""Reproducible benchmarks for the propagation, visibility and rendering hot paths.
+
+Every case runs on the bundled tleFiles/*.txt at a fixed epoch, for each
+satellite count in --sizes (the bundled catalog is repeated to reach large
+counts). Reported per case and size: best wall time, throughput in
+sat-steps/s and peak traced memory. Results are compared to the stored
+baseline and regressions beyond --tolerance are listed, e.g.
+
+    python benchmark.py
+    python benchmark.py --sizes 15,1000 --cases propagateBatch,visibilityDay
+    python benchmark.py --save          # store the current run as the new baseline
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+from skyfield.api import load, wgs84
+
+EPOCH = (2025, 9, 13)
+OBSERVER = (32.08, 34.78)
+SIZES = (15, 100, 1000, 10000)
+BASELINE = "benchmarkBaseline.json"
+DAY_STEPS = 24 * 60
+MIN_SECONDS = 0.5
+
+
+def bundledSatellites(ts):
+    # כל קבצי ה-TLE שבמאגר, בלי כפילויות, בסדר קבוע
+    satellites, seen = [], set()
+    for path in sorted(glob.glob("tleFiles/*.txt")):
+        if os.path.basename(path) in ("omerTle.txt", "constellation.txt"):
+            continue
+        for sat in load.tle_file(path, ts=ts):
+            if sat.model.satnum not in seen:
+                seen.add(sat.model.satnum)
+                satellites.append(sat)
+    return satellites
+
+
+def catalogOf(satellites, count):
+    return [satellites[i % len(satellites)] for i in range(count)]
+
+
+def dayTimes(ts, steps=DAY_STEPS):
+    return ts.utc(*EPOCH, 0, np.arange(steps) * 24 * 60 / steps)
+
+
+# כל case מקבל (satellites, ts), מכין את הקלט מחוץ למדידה,
+# ומחזיר (פונקציה למדידה, מספר sat-steps שהיא מחשבת)
+
+
+def caseParse(satellites, ts):
+    from tleStore import parseTleText
+    from skyfield.api import EarthSatellite
+    from sgp4.exporter import export_tle
+
+    text = "\n".join(f"{sat.name}\n" + "\n".join(export_tle(sat.model)) for sat in satellites)
+
+    def run():
+        return [EarthSatellite(line1, line2, name, ts) for name, line1, line2 in parseTleText(text)]
+
+    return run, len(satellites)
+
+
+def casePropagateSingle(satellites, ts):
+    # הבסיס הישן: קריאת sat.at(t) סקלרית לכל לוויין ולכל צעד זמן, על רשת של 10 דקות
+    times = dayTimes(ts, DAY_STEPS // 10)
+    steps = [times[i] for i in range(len(times.tt))]
+
+    def run():
+        return [[sat.at(t).position.km for t in steps] for sat in satellites]
+
+    return run, len(satellites) * len(steps)
+
+
+def casePropagateBatch(satellites, ts):
+    from propagation import propagateSatellites
+
+    times = dayTimes(ts)
+
+    def run():
+        with propagateSatellites(satellites, times, workers=1) as positions:
+            return positions.array.sum()
+
+    return run, len(satellites) * len(times)
+
+
+def caseVisibilityDay(satellites, ts):
+    from visibleSats import calcVisibilityMask
+
+    times = dayTimes(ts)
+    user = wgs84.latlon(*OBSERVER)
+
+    def run():
+        return calcVisibilityMask(satellites, user, times, 20, 90, workers=1).sum(axis=0)
+
+    return run, len(satellites) * len(times)
+
+
+def caseSpaceUser(satellites, ts):
+    import measure
+
+    times = dayTimes(ts)
+    route = load.tle_file("tleFiles/omerTle.txt", ts=ts)[0].at(times).position.km.T
+
+    def run():
+        satPos = measure.gnssPositions(satellites, times)
+        return measure.spaceVisibility(route, satPos, 20, 90, occultation=True)[2].sum()
+
+    return run, len(satellites) * len(times)
+
+
+def caseGroundTrack(satellites, ts):
+    from groundTrack import GroundTracks
+
+    tracks = GroundTracks(ts, horizonMinutes=720, stepSeconds=60)
+    start = ts.utc(*EPOCH)
+    satrecs = [sat.model for sat in satellites]
+
+    def run():
+        return tracks.paths(satrecs, start)
+
+    return run, len(satellites) * len(tracks.times(start))
+
+
+def casePlotFrame(satellites, ts):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import cartopy.crs as ccrs
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from catalog import Catalog
+    from ephemerisCache import EphemerisCache
+    from mapRenderer import MapRenderer
+
+    fig = plt.Figure(figsize=(10, 5))
+    ax = fig.add_subplot(1, 1, 1, projection=ccrs.PlateCarree())
+    canvas = FigureCanvasAgg(fig)
+    renderer = MapRenderer(ax, canvas)
+    renderer.drawMap(preserveView=False)
+
+    cache = EphemerisCache(ts)
+    catalog = Catalog.fromSatellites(satellites)
+    catalog.select(catalog.ids)
+    t = ts.utc(*EPOCH, 12)
+    # הטבלה של ה-cache נבנית פעם אחת, כמו ברענון רגיל של המפה
+    cache.catalogGroup(catalog, catalog.selectedIds()).subpointsAt(t)
+
+    def run():
+        ids = catalog.selectedIds()
+        lats, lons = cache.catalogGroup(catalog, ids).subpointsAt(t)
+        renderer.update(lons, lats, catalog.names[ids])
+
+    return run, len(satellites)
+
+
+# שם -> (case, מספר הלוויינים המקסימלי שעוד סביר למדוד)
+CASES = {
+    "parse": (caseParse, None),
+    "propagateSingle": (casePropagateSingle, 100),
+    "propagateBatch": (casePropagateBatch, None),
+    "visibilityDay": (caseVisibilityDay, None),
+    "spaceUser": (caseSpaceUser, 1000),
+    "groundTrack": (caseGroundTrack, None),
+    "plotFrame": (casePlotFrame, None),
+}
+
+
+def measureCase(case, satellites, ts, repeat):
+    run, steps = case(satellites, ts)
+    run()  # חימום
+
+    # case קצר חוזר עד שנאסף מספיק זמן, אחרת הרעש גדול מהמדידה
+    best, spent, runs = float("inf"), 0.0, 0
+    while runs < repeat or spent < MIN_SECONDS:
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best, spent, runs = min(best, elapsed), spent + elapsed, runs + 1
+
+    # זיכרון נמדד בריצה נפרדת, כי tracemalloc מאט את הזמנים
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {"seconds": best, "throughput": steps / best, "peakMB": peak / 2**20}
+
+
+def runBenchmarks(cases, sizes, repeat=3):
+    ts = load.timescale(builtin=True)
+    bundled = bundledSatellites(ts)
+    results = {}
+    for name in cases:
+        case, limit = CASES[name]
+        results[name] = {}
+        for size in sizes:
+            if limit is not None and size > limit:
+                continue
+            try:
+                result = measureCase(case, catalogOf(bundled, size), ts, repeat)
+            except ImportError as error:
+                # למשל plotFrame בלי cartopy
+                print(f"{name:16s} skipped: {error}")
+                break
+            results[name][str(size)] = result
+            print(
+                f"{name:16s} N={size:<6d} {result['seconds'] * 1000:10.2f} ms"
+                f" {result['throughput']:14,.0f} sat-steps/s {result['peakMB']:9.1f} MB"
+            )
+    return results
+
+
+def regressions(results, baseline, tolerance):
+    found = []
+    for name, sizes in results.items():
+        for size, result in sizes.items():
+            old = baseline.get(name, {}).get(size)
+            if old is None:
+                continue
+            if result["throughput"] < old["throughput"] * (1 - tolerance):
+                found.append(f"{name} N={size}: throughput {result['throughput']:,.0f} < baseline {old['throughput']:,.0f}")
+            if result["peakMB"] > old["peakMB"] * (1 + tolerance) + 1:
+                found.append(f"{name} N={size}: peak memory {result['peakMB']:.1f} MB > baseline {old['peakMB']:.1f} MB")
+    return found
+
+
+def environment():
+    import sgp4
+    import skyfield
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "skyfield": skyfield.__version__,
+        "sgp4": sgp4.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="comma separated satellite counts")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma separated case names")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case, the best one is kept")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown or memory growth")
+    parser.add_argument("--save", action="store_true", help="write this run as the new baseline")
+    args = parser.parse_args(argv)
+
+    cases = args.cases.split(",")
+    unknown = [name for name in cases if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    results = runBenchmarks(cases, [int(size) for size in args.sizes.split(",")], args.repeat)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+        print(f"{args.baseline} saved")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, run with --save to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    found = regressions(results, baseline["results"], args.tolerance)
+    for line in found:
+        print(f"REGRESSION {line}")
+    if not found:
+        print(f"no regressions against {args.baseline}")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import hashlib
+import numpy as np
+from sgp4.api import SatrecArray
+
+# איברי המסלול שנשמרים לכל לוויין, ביחידות של sgp4 (רדיאנים, rad/min)
+ELEMENTS = np.dtype(
+    [
+        ("jdsatepoch", np.float64),
+        ("jdsatepochF", np.float64),
+        ("bstar", np.float64),
+        ("ecco", np.float64),
+        ("argpo", np.float64),
+        ("inclo", np.float64),
+        ("mo", np.float64),
+        ("no_kozai", np.float64),
+        ("nodeo", np.float64),
+    ]
+)
+
+
+class Catalog:
+    """Satellites as parallel NumPy arrays addressed by integer id.
+
+    `names`, `satnums`, `designators` and the `elements` record array share
+    one index; a satellite's id is its row. `selected` is the boolean
+    selection mask. The Satrec objects are kept only to build `SatrecArray`
+    handles for batched propagation.
+    """
+
+    def __init__(self, names, satnums, designators, satrecs):
+        self.names = np.array(names, dtype=str)
+        self.satnums = np.asarray(satnums, dtype=np.int32)
+        self.designators = np.array(designators, dtype=str)
+        self.satrecs = list(satrecs)
+        self.elements = np.array([tuple(getattr(satrec, field) for field in ELEMENTS.names) for satrec in self.satrecs], dtype=ELEMENTS)
+        self.ids = np.arange(len(self.satrecs), dtype=np.int32)
+        self.selected = np.zeros(len(self.satrecs), dtype=bool)
+        self._satrecArray = None
+        self._chunkKeys = {}
+
+    @classmethod
+    def fromSatellites(cls, satellites):
+        return cls(
+            [sat.name or str(sat.model.satnum) for sat in satellites],
+            [sat.model.satnum for sat in satellites],
+            [sat.model.intldesg for sat in satellites],
+            [sat.model for sat in satellites],
+        )
+
+    @classmethod
+    def fromSatrecs(cls, satrecs, names):
+        return cls(names, [satrec.satnum for satrec in satrecs], [satrec.intldesg for satrec in satrecs], satrecs)
+
+    def __len__(self):
+        return len(self.satrecs)
+
+    def view(self, ids=None):
+        return CatalogView(self, self.ids if ids is None else ids)
+
+    def satrecArray(self, ids=None):
+        """Batched SGP4 handle for all satellites, or for the subset `ids`."""
+        if ids is None or len(ids) == len(self) and np.array_equal(ids, self.ids):
+            if self._satrecArray is None:
+                self._satrecArray = SatrecArray(self.satrecs)
+            return self._satrecArray
+        return SatrecArray([self.satrecs[i] for i in ids])
+
+    def earthSatellites(self, ts, ids=None):
+        """skyfield EarthSatellite objects for all satellites, or for the subset `ids`."""
+        from skyfield.api import EarthSatellite
+
+        satellites = []
+        for i in self.ids if ids is None else ids:
+            sat = EarthSatellite.from_satrec(self.satrecs[i], ts)
+            sat.name = str(self.names[i])
+            satellites.append(sat)
+        return satellites
+
+    def key(self, ids):
+        # מזהה קבוע לתת-קבוצה לפי איברי המסלול שלה, בשביל ה-cache של האפמרידות
+        return self.elements[ids].tobytes()
+
+    def chunkKey(self, chunk, size):
+        # hash של האיברים בגוש ids קבוע, נשמר כדי לא לחשב אותו בכל רענון
+        key = self._chunkKeys.get((chunk, size))
+        if key is None:
+            key = self._chunkKeys[chunk, size] = hashlib.sha1(self.key(slice(chunk * size, (chunk + 1) * size))).hexdigest()
+        return key
+
+    def idsOf(self, satnums):
+        """Catalog ids of the given NORAD numbers, -1 where the catalog has no such satellite."""
+        satnums = np.asarray(satnums)
+        order = np.argsort(self.satnums, kind="stable")
+        position = np.clip(np.searchsorted(self.satnums[order], satnums), 0, max(len(order) - 1, 0))
+        if len(order) == 0:
+            return np.full(len(satnums), -1, dtype=np.int32)
+        found = self.satnums[order][position] == satnums
+        return np.where(found, order[position], -1).astype(np.int32)
+
+    def selectedIds(self):
+        return np.flatnonzero(self.selected).astype(np.int32)
+
+    def toggle(self, id):
+        self.selected[id] = not self.selected[id]
+        return self.selected[id]
+
+    def select(self, ids):
+        self.selected[ids] = True
+
+    def clearSelection(self):
+        self.selected[:] = False
+
+
+class CatalogView:
+    """A filtered subset of a catalog: only the id array, no copies of the satellite data."""
+
+    def __init__(self, catalog, ids):
+        self.catalog = catalog
+        self.ids = np.asarray(ids, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        return self.ids[index]
+
+    def name(self, index):
+        return self.catalog.names[self.ids[index]]
+
+    def isSelected(self, index):
+        return self.catalog.selected[self.ids[index]]
+
+    def selectAll(self):
+        self.catalog.select(self.ids)
@@ -0,0 +1,280 @@
+"""Headless batch analyses: visibility, route and coverage.
+
+Runs without a display and without importing cartopy or Tk, e.g.
+
+    python cli.py visibility --tle Gps --observer 32.08,34.78 --hours 24 --step 60 -o visible.csv
+    python cli.py route --user-tle tleFiles/omerTle.txt --tle tleFiles/Gps.txt -o visibleSatsForSat.csv
+    python cli.py coverage --tle Gnss --grid-step 5 --step 300 -o coverage.csv
+    python cli.py coverage --tle walker:550,53,72,22,17 --tle walker:1110,53.8,32,50,1 --grid-step 5 -o mega.npz
+    python cli.py passes --tle Gps --observer 32.08,34.78 --min-elevation 10 -o passes.csv
+    python cli.py ephemeris --tle Gnss --hours 24 --step 60 -o gnss.eph
+    python cli.py route --route-output satRoute.eph -o visibleSatsForSat.csv
+"""
+
+import argparse
+import csv
+import os
+from datetime import datetime, timezone
+import numpy as np
+from skyfield.api import load, wgs84
+from coverage import CoverageGrid, globalGrid
+from passes import PassFinder
+from ephemerisFile import createEphemeris
+from propagation import propagateSatellites, propagationPool
+from resultWriter import ColumnWriter, outputFormat
+from sharedTime import timescale
+from tleFetcher import TleFetcher
+from tleStore import GROUPS, TleStore
+from tleFiles.makeTleFile import makeSatellites, parseShell
+from visibleSats import elevationsFrom
+import measure
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def loadSatellites(sources, ts):
+    # שם קבוצה (Gps, Gnss, ...) נטען מהמאגר המקומי, walker:... נבנה בזיכרון, כל השאר קובץ או URL
+    satellites = []
+    groups = [source for source in sources if source in GROUPS]
+    if groups:
+        # הקבוצות מתרעננות במקביל, ולוויין שמופיע בכמה קבוצות נטען פעם אחת
+        store = TleStore(ts)
+        TleFetcher(store).run(groups)
+        satellites += store.loadMerged(groups)
+    for source in sources:
+        if source in GROUPS:
+            continue
+        elif source.startswith("walker:"):
+            shell = parseShell(source[len("walker:") :])
+            satellites += makeSatellites(ts, (shell,), prefix=f"Walker-{len(satellites)}", baseNum=10001 + len(satellites))
+        else:
+            satellites += load.tle_file(source, ts=ts)
+    return satellites
+
+
+def parseObservers(observers=None, observersFile=None):
+    result = []
+    for text in observers or []:
+        lat, lon = map(float, text.split(","))
+        result.append((f"{lat:g},{lon:g}", lat, lon))
+    if observersFile:
+        with open(observersFile, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                lat, lon = float(row["lat"]), float(row["lon"])
+                result.append((row.get("name") or f"{lat:g},{lon:g}", lat, lon))
+    return result
+
+
+def gridObservers(step):
+    lats, lons = globalGrid(step)
+    return [(f"{lat:g},{lon:g}", lat, lon) for lat, lon in zip(lats, lons)]
+
+
+def parseStart(text):
+    if text is None:
+        today = datetime.now(timezone.utc)
+        return datetime(today.year, today.month, today.day, tzinfo=timezone.utc)
+    start = datetime.fromisoformat(text)
+    return start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+
+
+def windowTimes(ts, start, hours, step, chunkSize):
+    # חלון הזמן מחולק לחלקים, כך שהזיכרון חסום גם בריצות ארוכות
+    seconds = np.arange(0, hours * 3600, step)
+    chunkSize = chunkSize or len(seconds)
+    for first in range(0, len(seconds), chunkSize):
+        yield ts.utc(start.year, start.month, start.day, start.hour, start.minute, start.second + seconds[first : first + chunkSize])
+
+
+def runVisibility(satellites, observers, ts, start, hours, step, minElevation, maxElevation, output, workers=None, chunkSize=1440):
+    names = np.array([sat.name for sat in satellites], dtype=object)
+    users = [wgs84.latlon(lat, lon) for name, lat, lon in observers]
+    columnar = outputFormat(output) != "csv"
+
+    if columnar:
+        # שורה לכל (זמן, צופה, לוויין) נראה; שמות הצופים והלוויינים במילונים
+        columns = [("time", np.int64), ("observer", np.int32), ("sat", np.int32)]
+        dictionaries = {"observer": [name for name, lat, lon in observers], "sat": names.tolist()}
+        writer = ColumnWriter(output, columns, dictionaries)
+    else:
+        f = open(output, "w", newline="", encoding="utf-8")
+        writer = csv.writer(f)
+        writer.writerow(["time", "observer", "numVisible", "sats"])
+
+    offset = 0
+    # pool אחד לכל הריצה, לא אחד לכל חלק זמן
+    with propagationPool(workers) as pool:
+        for times in windowTimes(ts, start, hours, step, chunkSize):
+            with propagateSatellites(satellites, times, workers=workers, pool=pool) as positions:
+                masks = []
+                for user in users:
+                    elevations = elevationsFrom(positions.array, user)
+                    masks.append((elevations >= minElevation) & (elevations <= maxElevation))
+
+            if columnar:
+                observer, sat, sample = np.nonzero(np.stack(masks))
+                order = np.lexsort((sat, observer, sample))
+                seconds = start.timestamp() + (offset + sample[order]) * step
+                writer.write(time=np.round(seconds), observer=observer[order], sat=sat[order])
+            else:
+                for i, label in enumerate(times.utc_strftime(TIME_FORMAT)):
+                    for (name, lat, lon), visible in zip(observers, masks):
+                        visibleSats = names[visible[:, i]]
+                        writer.writerow([label, name, len(visibleSats), ", ".join(visibleSats)])
+                f.flush()
+            offset += len(times)
+
+    if columnar:
+        writer.close()
+    else:
+        f.close()
+    print(f"{output} created")
+
+
+def runCoverage(
+    satellites, observers, ts, start, hours, step, minElevation, maxElevation, output, workers=None, chunkSize=1440, dop=False
+):
+    lats = [lat for name, lat, lon in observers]
+    lons = [lon for name, lat, lon in observers]
+    grid = CoverageGrid(lats, lons, minElevation, maxElevation, dop)
+
+    # טנזור ECEF אחד לכל חלק זמן, משותף לכל הצופים
+    with propagationPool(workers) as pool:
+        for times in windowTimes(ts, start, hours, step, chunkSize):
+            with propagateSatellites(satellites, times, workers=workers, pool=pool) as positions:
+                grid.add(positions.array)
+
+    result = grid.result()
+    columns = ["minVisible", "meanVisible", "maxVisible"] + (["meanGdop", "meanPdop"] if dop else [])
+    with open(output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["observer", "lat", "lon"] + columns)
+        for i, (name, lat, lon) in enumerate(observers):
+            writer.writerow([name, lat, lon] + [result[column][i] for column in columns])
+
+    print(f"{output} created")
+
+
+def runPasses(satellites, observers, ts, start, hours, step, minElevation, maxElevation, output, workers=None, tolerance=0.1):
+    t0 = ts.from_datetime(start)
+    t1 = ts.tt_jd(t0.tt + hours / 24)
+
+    with open(output, "w", newline="", encoding="utf-8") as f, propagationPool(workers) as pool:
+        writer = csv.writer(f)
+        writer.writerow(["observer", "sat", "rise", "culmination", "set", "maxElevation"])
+        for name, lat, lon in observers:
+            finder = PassFinder(satellites, wgs84.latlon(lat, lon), ts, minElevation, maxElevation, step, tolerance)
+            for sat, table in zip(satellites, finder.find(t0, t1, workers, pool)):
+                for rise, culmination, set_, peak in table:
+                    rise, culmination, set_ = ts.tt_jd(np.array([rise, culmination, set_])).utc_iso(places=1)
+                    writer.writerow([name, sat.name, rise, culmination, set_, peak])
+
+    print(f"{output} created")
+
+
+def runEphemeris(satellites, ts, start, hours, step, output, frame="itrs", workers=None):
+    # ה-workers כותבים ישירות לקובץ, בלי לעבור דרך זיכרון משותף
+    times = next(windowTimes(ts, start, hours, step, chunkSize=None))
+    ids = [sat.model.satnum for sat in satellites]
+    names = [sat.name for sat in satellites]
+    with createEphemeris(output, times[0], step, frame, ids, names, len(times.tt)) as eph:
+        propagateSatellites(satellites, times, frame, workers, out=eph)
+    print(f"{output} created")
+
+
+def runRoute(userTle, gnssTle, ts, start, hours, step, minElevation, maxElevation, output, routeOutput):
+    times = next(windowTimes(ts, start, hours, step, chunkSize=None))
+    measure.createSatRoute(userTle, routeOutput, times, TIME_FORMAT)
+    measure.measureVisibleSats(minElevation, maxElevation, gnssTle, routeOutput, output)
+
+
+def buildParser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def addWindow(command, minElevation):
+        command.add_argument("--start", help="UTC start, ISO format (default: today 00:00 UTC)")
+        command.add_argument("--hours", type=float, default=24)
+        command.add_argument("--step", type=float, default=60, help="seconds between samples")
+        command.add_argument("--min-elevation", type=float, default=minElevation)
+        command.add_argument("--max-elevation", type=float, default=90)
+        command.add_argument("-o", "--output", required=True)
+
+    def addSources(command):
+        command.add_argument(
+            "--tle",
+            action="append",
+            help="group name (Gnss, Gps, ...), TLE file, URL or walker:alt,incl,planes,perPlane[,phasing[,delta|star]]; repeatable",
+        )
+        command.add_argument("--workers", type=int, help="propagation processes (default: all cores)")
+        command.add_argument("--chunk", type=int, default=1440, help="time samples per propagation chunk")
+
+    visibility = commands.add_parser("visibility", help="visible satellites per time step for each observer")
+    addSources(visibility)
+    visibility.add_argument("--observer", action="append", help="lat,lon; repeatable")
+    visibility.add_argument("--observers", help="CSV file with lat,lon[,name] columns")
+    addWindow(visibility, 0)
+
+    coverage = commands.add_parser("coverage", help="min/mean visible-satellite counts per observer or grid cell")
+    addSources(coverage)
+    coverage.add_argument("--observer", action="append", help="lat,lon; repeatable")
+    coverage.add_argument("--observers", help="CSV file with lat,lon[,name] columns")
+    coverage.add_argument("--grid-step", type=float, help="use a global lat/lon grid with this spacing in degrees")
+    coverage.add_argument("--dop", action="store_true", help="also report mean GDOP/PDOP per observer")
+    addWindow(coverage, 0)
+
+    passes = commands.add_parser("passes", help="rise/culmination/set of every pass through the elevation window")
+    addSources(passes)
+    passes.add_argument("--observer", action="append", help="lat,lon; repeatable")
+    passes.add_argument("--observers", help="CSV file with lat,lon[,name] columns")
+    passes.add_argument("--tolerance", type=float, default=0.1, help="crossing time accuracy in seconds")
+    addWindow(passes, 0)
+    passes.set_defaults(step=300)
+
+    ephemeris = commands.add_parser("ephemeris", help="binary (sats, times, 3) ephemeris file for later runs")
+    addSources(ephemeris)
+    ephemeris.add_argument("--frame", choices=("itrs", "teme"), default="itrs")
+    addWindow(ephemeris, 0)
+
+    route = commands.add_parser("route", help="GNSS satellites visible from a satellite in orbit")
+    route.add_argument("--user-tle", default="tleFiles/omerTle.txt", help="TLE file of the user satellite")
+    route.add_argument("--tle", default="tleFiles/Gps.txt", help="GNSS TLE file")
+    route.add_argument("--route-output", default="satRoute.csv", help="route file, .csv or binary .eph")
+    addWindow(route, 20)
+    return parser
+
+
+def main(argv=None):
+    args = buildParser().parse_args(argv)
+    ts = timescale()
+    start = parseStart(args.start)
+    window = (ts, start, args.hours, args.step, args.min_elevation, args.max_elevation, args.output)
+
+    if args.command == "route":
+        runRoute(args.user_tle, args.tle, *window, args.route_output)
+        return
+
+    satellites = loadSatellites(args.tle or ["Gps"], ts)
+    if args.command == "ephemeris":
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        runEphemeris(satellites, ts, start, args.hours, args.step, args.output, args.frame, args.workers)
+        return
+
+    if args.command == "coverage" and args.grid_step:
+        observers = gridObservers(args.grid_step)
+    else:
+        observers = parseObservers(args.observer, args.observers)
+    if not observers:
+        raise SystemExit("no observers given")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    if args.command == "passes":
+        runPasses(satellites, observers, *window, workers=args.workers, tolerance=args.tolerance)
+    elif args.command == "visibility":
+        runVisibility(satellites, observers, *window, workers=args.workers, chunkSize=args.chunk)
+    else:
+        runCoverage(satellites, observers, *window, workers=args.workers, chunkSize=args.chunk, dop=args.dop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import numpy as np
+from skyfield.api import wgs84
+
+
+def globalGrid(step):
+    # מרכזי תאים של רשת גלובלית, שטוחים -> (cells,)
+    lats = np.arange(-90 + step / 2, 90, step)
+    lons = np.arange(-180 + step / 2, 180, step)
+    lats, lons = np.meshgrid(lats, lons, indexing="ij")
+    return lats.ravel(), lons.ravel()
+
+
+class CoverageGrid:
+    """Visible-satellite statistics for many ground observers at once.
+
+    `add` takes one propagated ITRS tensor (sats, times, 3) in km and
+    evaluates every observer against it with chunked NumPy broadcasting
+    (observers x sats x times), keeping each chunk under `memoryCap` bytes.
+    Call it once per time chunk of a long window, then read `result()`.
+    """
+
+    def __init__(self, lats, lons, minElevation, maxElevation=90, dop=False, memoryCap=512 * 2**20):
+        self.lats = np.asarray(lats, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        self.sinMin = np.sin(np.radians(minElevation))
+        self.sinMax = np.sin(np.radians(maxElevation))
+        self.dop = dop
+        self.memoryCap = memoryCap
+
+        observers = wgs84.latlon(self.lats, self.lons)
+        self.positions = np.atleast_2d(observers.itrs_xyz.km.T)
+        lat, lon = np.radians(self.lats), np.radians(self.lons)
+        self.up = np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+        cells = len(self.lats)
+        self.minVisible = np.full(cells, np.iinfo(np.int64).max)
+        self.maxVisible = np.zeros(cells, dtype=np.int64)
+        self.sumVisible = np.zeros(cells, dtype=np.int64)
+        self.steps = 0
+        if dop:
+            self.sumGdop = np.zeros(cells)
+            self.sumPdop = np.zeros(cells)
+            self.dopSteps = np.zeros(cells, dtype=np.int64)
+
+    def chunkSizes(self, sats, times):
+        # בערך כמה מערכים בגודל (observers, sats, times) חיים יחד בכל חלק
+        arrays = 16 if self.dop else 5
+        perObserver = max(1, sats * times * arrays * 8)
+        observers = max(1, self.memoryCap // perObserver)
+        if observers > 1:
+            return min(observers, len(self.lats)), times
+        return 1, max(1, self.memoryCap // max(1, sats * arrays * 8))
+
+    def add(self, satPos):
+        sats, times = satPos.shape[:2]
+        observerChunk, timeChunk = self.chunkSizes(sats, times)
+
+        for t0 in range(0, times, timeChunk):
+            chunk = satPos[:, t0 : t0 + timeChunk]
+            for o0 in range(0, len(self.lats), observerChunk):
+                self.addChunk(chunk, slice(o0, o0 + observerChunk))
+        self.steps += times
+
+    def addChunk(self, satPos, cells):
+        observers, up = self.positions[cells], self.up[cells]
+        sats, times = satPos.shape[:2]
+
+        # sin(el) = (r·u - o·u) / |r - o|, עם מכפלות מטריצה במקום טנזור הפרשים
+        flat = satPos.reshape(-1, 3)
+        rr = np.einsum("nc,nc->n", flat, flat)[:, None]
+        distance = np.sqrt(rr - 2 * (flat @ observers.T) + np.einsum("oc,oc->o", observers, observers))
+        sinElevation = (flat @ up.T - np.einsum("oc,oc->o", observers, up)) / distance
+        visible = ((sinElevation >= self.sinMin) & (sinElevation <= self.sinMax)).reshape(sats, times, -1)
+
+        counts = visible.sum(axis=0).T
+        self.minVisible[cells] = np.minimum(self.minVisible[cells], counts.min(axis=1))
+        self.maxVisible[cells] = np.maximum(self.maxVisible[cells], counts.max(axis=1))
+        self.sumVisible[cells] += counts.sum(axis=1)
+
+        if self.dop:
+            difference = satPos[None] - observers[:, None, None, :]
+            lineOfSight = difference / np.linalg.norm(difference, axis=-1)[..., None]
+            gdop, pdop = dilutionOfPrecision(lineOfSight, visible.transpose(2, 0, 1))
+            solved = np.isfinite(gdop)
+            self.sumGdop[cells] += np.where(solved, gdop, 0).sum(axis=1)
+            self.sumPdop[cells] += np.where(solved, pdop, 0).sum(axis=1)
+            self.dopSteps[cells] += solved.sum(axis=1)
+
+    def result(self):
+        result = {
+            "lat": self.lats,
+            "lon": self.lons,
+            "minVisible": self.minVisible,
+            "meanVisible": self.sumVisible / max(self.steps, 1),
+            "maxVisible": self.maxVisible,
+        }
+        if self.dop:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                result["meanGdop"] = self.sumGdop / self.dopSteps
+                result["meanPdop"] = self.sumPdop / self.dopSteps
+        return result
+
+
+def dilutionOfPrecision(lineOfSight, visible):
+    # מטריצת הגאומטריה G^T G עם שורות [-e, 1] לכל לוויין נראה -> (observers, times, 4, 4)
+    weight = visible.astype(float)
+    lineOfSight = np.where(visible[..., None], lineOfSight, 0.0)
+    normal = np.empty(visible.shape[:1] + visible.shape[2:] + (4, 4))
+    normal[..., :3, :3] = np.einsum("ost,ostc,ostd->otcd", weight, lineOfSight, lineOfSight)
+    normal[..., :3, 3] = -np.einsum("ost,ostc->otc", weight, lineOfSight)
+    normal[..., 3, :3] = normal[..., :3, 3]
+    normal[..., 3, 3] = weight.sum(axis=1)
+
+    gdop = np.full(normal.shape[:2], np.inf)
+    pdop = np.full(normal.shape[:2], np.inf)
+    enough = normal[..., 3, 3] >= 4
+    if enough.any():
+        with np.errstate(invalid="ignore"):
+            covariance = np.linalg.pinv(normal[enough])
+            diagonal = np.diagonal(covariance, axis1=-2, axis2=-1)
+            gdop[enough] = np.sqrt(diagonal.sum(axis=-1))
+            pdop[enough] = np.sqrt(diagonal[..., :3].sum(axis=-1))
+    return gdop, pdop
@@ -0,0 +1,182 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from propagation import gmstAngles, itrsToLatLon, propagateSatrecs, sgp4Times
+
+
+# טבלאות נבנות לגושים קבועים של ids בקטלוג, כך ששינוי בבחירה לא מבטל אותן
+CHUNK = 256
+
+
+class EphemerisGroup:
+    """The satellites `ids` of a Catalog, with positions served from the cache.
+
+    The ids are split by the fixed catalog chunk they fall in; `chunks` holds
+    (chunk, rows in that chunk's table, positions in the group) for each.
+    """
+
+    def __init__(self, cache, catalog, ids):
+        self.cache = cache
+        self.catalog = catalog
+        self.ids = np.asarray(ids, dtype=np.int32)
+        chunkOf = self.ids // CHUNK
+        self.chunks = [
+            (int(chunk), self.ids[chunkOf == chunk] - chunk * CHUNK, np.flatnonzero(chunkOf == chunk)) for chunk in np.unique(chunkOf)
+        ]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def positionsAt(self, t, build=True):
+        """ITRS km, shape (sats, 3) for a scalar Time or (sats, times, 3) for an array.
+
+        With `build=False` nothing is propagated: None is returned when a table is missing.
+        """
+        return self.cache.interpolate(self, t, build)
+
+    def subpointsAt(self, t, build=True):
+        """Geodetic (lat, lon) in degrees with the same shape and `build` rules as `positionsAt`."""
+        positions = self.positionsAt(t, build)
+        return None if positions is None else itrsToLatLon(positions)
+
+    def missing(self, t):
+        return self.cache.missing(self, t)
+
+    def prepare(self, t, task=None):
+        """Build the tables `positionsAt(t)` needs, e.g. on a background thread."""
+        for chunk, window in self.missing(t):
+            if task is not None:
+                task.check()
+            self.cache.table(self.catalog, chunk, window)
+
+
+class EphemerisCache:
+    """Precomputed ITRS position tables with LRU eviction under a memory budget.
+
+    Tables are built per chunk of `CHUNK` catalog ids and keyed by (hash of
+    the chunk's elements, time window, step), so any selection reuses the
+    tables of the chunks it touches. They are sampled every `stepSeconds`;
+    positions in between come from Lagrange interpolation over `order`
+    neighbouring samples.
+    """
+
+    def __init__(self, ts, maxBytes=256 * 2**20, windowMinutes=360, stepSeconds=60, order=8):
+        self.ts = ts
+        self.maxBytes = maxBytes
+        self.windowDays = windowMinutes / 1440
+        self.stepSeconds = stepSeconds
+        self.stepDays = stepSeconds / 86400
+        self.order = order
+        self.margin = order // 2
+        self.samples = int(round(windowMinutes * 60 / stepSeconds)) + 2 * self.margin + 1
+
+        self.tables = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._groups = OrderedDict()
+        # המסלול של onPick והטבלאות החסרות מחושבים ב-thread רקע, במקביל לרענון המפה
+        self.lock = threading.Lock()
+
+    def catalogGroup(self, catalog, ids, maxGroups=32):
+        """Group for the satellites `ids` of a Catalog."""
+        ids = np.asarray(ids, dtype=np.int32)
+        memo = (id(catalog), ids.tobytes())
+        with self.lock:
+            group = self._groups.get(memo)
+            if group is not None:
+                self._groups.move_to_end(memo)
+                return group
+            # ה-group שומר הפניה לקטלוג, כך שה-id שלו לא ימוחזר כל עוד הוא בזיכרון
+            group = self._groups[memo] = EphemerisGroup(self, catalog, ids)
+            while len(self._groups) > maxGroups:
+                self._groups.popitem(last=False)
+        return group
+
+    def clear(self):
+        with self.lock:
+            self.tables.clear()
+            self._groups.clear()
+            self.nbytes = 0
+
+    def windows(self, t):
+        return np.floor(np.atleast_1d(t.tt) / self.windowDays).astype(np.int64)
+
+    def missing(self, group, t):
+        """(chunk, window) pairs whose tables `group` still needs for the times `t`."""
+        with self.lock:
+            return [
+                (chunk, int(window))
+                for window in np.unique(self.windows(t))
+                for chunk, rows, positions in group.chunks
+                if (group.catalog.chunkKey(chunk, CHUNK), int(window), self.stepSeconds) not in self.tables
+            ]
+
+    def table(self, catalog, chunk, window, build=True):
+        key = (catalog.chunkKey(chunk, CHUNK), window, self.stepSeconds)
+        with self.lock:
+            table = self.tables.get(key)
+            if table is not None:
+                self.hits += 1
+                self.tables.move_to_end(key)
+                return table
+            if not build:
+                return None
+            self.misses += 1
+
+        start = window * self.windowDays - self.margin * self.stepDays
+        times = self.ts.tt_jd(start + np.arange(self.samples) * self.stepDays)
+        jd, fr = sgp4Times(times)
+        ids = np.arange(chunk * CHUNK, min((chunk + 1) * CHUNK, len(catalog)))
+        table = propagateSatrecs(catalog.satrecArray(ids), jd, fr, gmstAngles(times))
+
+        with self.lock:
+            if key not in self.tables:
+                self.tables[key] = table
+                self.nbytes += table.nbytes
+            while self.nbytes > self.maxBytes and len(self.tables) > 1:
+                oldKey, old = self.tables.popitem(last=False)
+                self.nbytes -= old.nbytes
+        return table
+
+    def interpolate(self, group, t, build=True):
+        tt = np.atleast_1d(t.tt)
+        windows = self.windows(t)
+
+        # קודם אוספים את כל הטבלאות, כדי שבלי build לא יחושב כלום אם אחת חסרה
+        tables = {}
+        for window in np.unique(windows):
+            for chunk, rows, positions in group.chunks:
+                table = self.table(group.catalog, chunk, int(window), build)
+                if table is None:
+                    return None
+                tables[chunk, int(window)] = table
+
+        out = np.empty((len(group), len(tt), 3))
+        for window in np.unique(windows):
+            inWindow = np.flatnonzero(windows == window)
+
+            # מיקום יחסי ברשת הדגימות ואינדקס תחילת החלון של לגרנז'
+            u = (tt[inWindow] - window * self.windowDays) / self.stepDays + self.margin
+            first = np.floor(u).astype(np.int64) - (self.order // 2 - 1)
+            first = np.clip(first, 0, self.samples - self.order)
+            x = u - first
+
+            weights = lagrangeWeights(x, self.order)
+            indexes = first[:, None] + np.arange(self.order)
+            for chunk, rows, positions in group.chunks:
+                table = tables[chunk, int(window)]
+                out[np.ix_(positions, inWindow)] = np.einsum("qk,sqkc->sqc", weights, table[rows[:, None, None], indexes])
+
+        return out[:, 0] if np.ndim(t.tt) == 0 else out
+
+
+def lagrangeWeights(x, order):
+    # משקלי לגרנז' לצמתים 0..order-1, עבור כל x -> (len(x), order)
+    nodes = np.arange(order)
+    diffs = x[:, None] - nodes
+    weights = np.empty((len(x), order))
+    for j in range(order):
+        others = nodes != j
+        weights[:, j] = np.prod(diffs[:, others], axis=1) / np.prod(j - nodes[others])
+    return weights
@@ -0,0 +1,129 @@
+import csv
+import json
+import os
+import struct
+import numpy as np
+
+# קובץ אפמרידות: MAGIC, אורך הכותרת (uint64), כותרת JSON מרופדת ל-64 בתים,
+# ואחריה בלוק float64 little-endian בצורה (sats, times, 3) בק"מ
+MAGIC = b"SATEPH1\n"
+EXTENSION = ".eph"
+ALIGN = 64
+FRAMES = ("itrs", "teme", "gcrs")
+
+
+def isEphemeris(path):
+    return os.path.splitext(path)[1].lower() == EXTENSION
+
+
+class EphemerisFile:
+    """A memory-mapped ephemeris file.
+
+    `positions` is an np.memmap over the data block, so any number of
+    processes can open the same file without copying it. The header holds
+    `epoch` (whole, fraction) TT Julian date of the first sample, `step` in seconds,
+    `frame`, the NORAD `ids` and `names` of the satellites.
+    """
+
+    def __init__(self, path, mode="r"):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"not an ephemeris file: {path}")
+            (length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(length))
+
+        self.epoch = tuple(header["epoch"])
+        self.step = header["step"]
+        self.frame = header["frame"]
+        self.ids = np.array(header["ids"], dtype=np.int64)
+        self.names = header["names"]
+        self.shape = (len(self.ids), header["times"], 3)
+        offset = len(MAGIC) + 8 + length
+        self.positions = np.memmap(path, dtype="<f8", mode=mode, offset=offset, shape=self.shape)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def times(self, ts):
+        whole, fraction = self.epoch
+        return ts.tt_jd(whole, fraction + np.arange(self.shape[1]) * self.step / 86400)
+
+    def close(self):
+        if self.positions is not None and self.positions.mode != "r":
+            self.positions.flush()
+        self.positions = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def createEphemeris(path, epoch, step, frame, ids, names, count):
+    """Write the header, size the file and return it opened for writing.
+
+    `epoch` is the first sample time, a skyfield Time; it is kept as a whole
+    and a fractional TT Julian date so sample times stay exact to the microsecond.
+    """
+    if frame not in FRAMES:
+        raise ValueError(f"unknown frame: {frame}")
+    whole, fraction = np.atleast_1d(epoch.whole)[0], np.atleast_1d(epoch.tt_fraction)[0]
+    header = {
+        "epoch": [float(whole), float(fraction)],
+        "step": float(step),
+        "frame": frame,
+        "times": int(count),
+        "ids": [int(i) for i in ids],
+        "names": [str(name) for name in names],
+    }
+    text = json.dumps(header).encode()
+    # ריפוד ברווחים כדי שהבלוק יתחיל בכתובת מיושרת
+    text += b" " * (-(len(MAGIC) + 8 + len(text)) % ALIGN)
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(text)))
+        f.write(text)
+        f.truncate(f.tell() + len(header["ids"]) * header["times"] * 3 * 8)
+    return EphemerisFile(path, mode="r+")
+
+
+def uniformStep(times):
+    # הפורמט שומר רק epoch וצעד, אז הזמנים חייבים להיות במרווחים שווים
+    whole, fraction = np.atleast_1d(times.whole), np.atleast_1d(times.tt_fraction)
+    if len(whole) < 2:
+        return 0.0
+    # הפרשים מ-whole+fraction, כי jd אחד ב-float64 מדויק רק לעשרות מיקרו-שניות
+    steps = (np.diff(whole) + np.diff(fraction)) * 86400
+    step = round(float(np.median(steps)), 6)
+    if not np.allclose(steps, step, atol=1e-3):
+        raise ValueError("ephemeris files need evenly spaced times")
+    return step
+
+
+def writeEphemeris(path, positions, times, frame, ids, names):
+    positions = np.asarray(positions, dtype=np.float64).reshape(len(ids), -1, 3)
+    with createEphemeris(path, times[0] if np.ndim(times.tt) else times, uniformStep(times), frame, ids, names, positions.shape[1]) as eph:
+        eph.positions[:] = positions
+
+
+def exportCsv(path, csvPath, ts, satIndex=0, timeFormat="%Y-%m-%dT%H:%M:%SZ"):
+    """One satellite of an ephemeris file as time,x,y,z rows (the satRoute.csv layout)."""
+    with EphemerisFile(path) as eph:
+        labels = eph.times(ts).utc_strftime(timeFormat)
+        with open(csvPath, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time", "x", "y", "z"])
+            writer.writerows([label, *xyz] for label, xyz in zip(labels, eph.positions[satIndex].tolist()))
+    print(f"{csvPath} created")
+
+
+def importCsv(csvPath, path, frame="gcrs", id=0, name="route"):
+    """Convert a time,x,y,z route CSV (e.g. satRoute.csv) into an ephemeris file."""
+    from measure import readSatRoute, routeTimes
+
+    labels, positions = readSatRoute(csvPath)
+    writeEphemeris(path, positions[None], routeTimes(labels), frame, [id], [name])
+    print(f"{path} created")
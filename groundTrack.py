@@ -0,0 +1,69 @@
+import numpy as np
+from ephemerisCache import EphemerisGroup
+from propagation import gmstAngles, itrsToLatLon, propagateSatrecs, sgp4Times
+
+
+class GroundTracks:
+    """Future ground tracks for many satellites over `horizonMinutes`, sampled every `stepSeconds`.
+
+    All satellites are propagated over the whole time array in one SGP4
+    call and converted to subpoints without Python loops. Given an
+    `EphemerisGroup` instead, the samples are interpolated from the
+    cache's tables, so repeated tracks of the same satellites skip SGP4.
+    """
+
+    def __init__(self, ts, horizonMinutes=720, stepSeconds=60):
+        self.ts = ts
+        self.horizonMinutes = horizonMinutes
+        self.stepSeconds = stepSeconds
+
+    def times(self, start=None, horizonMinutes=None):
+        if start is None:
+            start = self.ts.now()
+        horizon = (horizonMinutes or self.horizonMinutes) * 60
+        seconds = np.arange(0, horizon + self.stepSeconds / 2, self.stepSeconds)
+        return self.ts.tt_jd(start.tt + seconds / 86400)
+
+    def subpoints(self, satrecs, start=None, horizonMinutes=None):
+        """(lats, lons) in degrees, shape (sats, samples); `satrecs` is a Satrec list, a SatrecArray or an EphemerisGroup."""
+        times = self.times(start, horizonMinutes)
+        if isinstance(satrecs, EphemerisGroup):
+            return satrecs.subpointsAt(times)
+        jd, fr = sgp4Times(times)
+        positions = propagateSatrecs(satrecs, jd, fr, gmstAngles(times))
+        return itrsToLatLon(positions)
+
+    def paths(self, satrecs, start=None, horizonMinutes=None):
+        """Flat (lons, lats) ready for a single `plot` call, see `splitAntimeridian`."""
+        lats, lons = self.subpoints(satrecs, start, horizonMinutes)
+        return splitAntimeridian(lats, lons)
+
+
+def splitAntimeridian(lats, lons):
+    """Join (tracks, samples) subpoints into one flat line broken by NaN.
+
+    Each crossing of the antimeridian ends the segment at the map edge and
+    starts the next one on the opposite edge, at the interpolated latitude.
+    Separate tracks are separated by NaN as well.
+    """
+    lats, lons = np.atleast_2d(lats), np.atleast_2d(lons)
+    nan = np.full((len(lats), 1), np.nan)
+    # NaN בסוף כל מסלול מפריד בין לוויינים; הפרש מול NaN לא נחשב חציה
+    lats = np.hstack([lats, nan]).ravel()
+    lons = np.hstack([lons, nan]).ravel()
+
+    step = np.diff(lons)
+    crossing = np.nonzero(np.abs(step) > 180)[0]
+    if len(crossing) == 0:
+        return lons, lats
+
+    edge = np.where(step[crossing] < 0, 180.0, -180.0)
+    before, after = lons[crossing], lons[crossing + 1] + 2 * edge
+    fraction = (edge - before) / (after - before)
+    latEdge = lats[crossing] + fraction * (lats[crossing + 1] - lats[crossing])
+
+    # בכל חציה נכנסות שלוש נקודות: קצה המפה, הפסקה, והקצה הנגדי
+    at = np.repeat(crossing + 1, 3)
+    newLons = np.column_stack([edge, np.full(len(edge), np.nan), -edge]).ravel()
+    newLats = np.column_stack([latEdge, np.full(len(edge), np.nan), latEdge]).ravel()
+    return np.insert(lons, at, newLons), np.insert(lats, at, newLats)
@@ -0,0 +1,81 @@
+import numpy as np
+import cartopy.feature as cfeature
+
+
+class MapRenderer:
+    """Draws satellite positions over a cached map background with blitting.
+
+    The cartopy background (stock image, coastlines, borders and any static
+    overlays) is rasterized only on full canvas draws and saved with
+    `copy_from_bbox`. Satellites live in one animated scatter collection and
+    a pool of reusable labels, so a position update only restores the saved
+    background and redraws those artists.
+    """
+
+    def __init__(self, ax, canvas, maxLabels=100):
+        self.ax = ax
+        self.canvas = canvas
+        self.maxLabels = maxLabels
+        self.background = None
+        self.points = None
+        self.labels = []
+        self.canvas.mpl_connect("draw_event", self.onDraw)
+
+    def drawMap(self, preserveView=True):
+        if preserveView:
+            xlim = self.ax.get_xlim()
+            ylim = self.ax.get_ylim()
+
+        self.ax.clear()
+        self.ax.stock_img()
+        self.ax.coastlines()
+        self.ax.add_feature(cfeature.BORDERS)
+
+        # ax.clear() מוחק את כל האמנים, אז בונים מחדש את האוסף ואת מאגר התוויות
+        self.points = self.ax.scatter(np.empty(0), np.empty(0), s=25, c="b", picker=5, animated=True, zorder=5)
+        self.labels = []
+
+        if preserveView:
+            self.ax.set_xlim(xlim)
+            self.ax.set_ylim(ylim)
+        self.canvas.draw()
+
+    def onDraw(self, event):
+        # כל ציור מלא (זום, הזזה, שינוי גודל, שכבות סטטיות) שומר רקע חדש
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self.drawAnimated()
+
+    def drawAnimated(self):
+        if self.points is None:
+            return
+        self.ax.draw_artist(self.points)
+        for label in self.labels:
+            if label.get_visible():
+                self.ax.draw_artist(label)
+
+    def update(self, lons, lats, names, blit=True):
+        self.points.set_offsets(np.column_stack([lons, lats]))
+
+        shown = min(len(names), self.maxLabels)
+        while len(self.labels) < shown:
+            self.labels.append(self.ax.text(0, 0, "", fontsize=8, color="black", animated=True))
+        for label, lon, lat, name in zip(self.labels, lons, lats, names):
+            label.set_position((lon + 0.5, lat + 0.5))
+            label.set_text(name)
+            label.set_visible(True)
+        for label in self.labels[shown:]:
+            label.set_visible(False)
+
+        if blit:
+            self.blit()
+
+    def blit(self):
+        if self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self.drawAnimated()
+        self.canvas.blit(self.canvas.figure.bbox)
+
+    def position(self, index):
+        return self.points.get_offsets()[index]
@@ -3,79 +3,147 @@ from skyfield.api import load
 from datetime import datetime, timezone
 import numpy as np
 from collections import Counter
-import matplotlib.pyplot as plt
+from resultWriter import ColumnWriter
+from ephemerisFile import EphemerisFile, isEphemeris, writeEphemeris
+from sharedTime import timescale
 
-ts = load.timescale()
-now = datetime.now(timezone.utc)
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+EARTH_RADIUS = 6378.137
 
 
-def createSatRoute():
-    satellite = load.tle_file("tleFiles/omerTle.txt")[0]
-    rows = []
+def today():
+    return datetime.now(timezone.utc)
 
-    for hour in range(24):
-        for minute in range(60):
-            t = ts.utc(now.year, now.month, now.day, hour, minute, 0)
-            geo = satellite.at(t)
-            rows.append({"time": f"{hour:02d}:{minute:02d}", "x": geo.xyz.km[0], "y": geo.xyz.km[1], "z": geo.xyz.km[2]})
 
-    with open("satRoute.csv", "w", newline="") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=["time", "x", "y", "z"])
-        writer.writeheader()
-        writer.writerows(rows)
-
-    print(f"{csvfile.name} created")
-
-
-def measureVisibleSats():
-    minElevation = 20
-    maxElevation = 90
-
-    satellites = load.tle_file("tleFiles/Gps.txt")
-    results = []
+def dayTimes(day=None):
+    day = day or today()
+    return timescale().utc(day.year, day.month, day.day, 0, range(24 * 60), 0)
 
-    with open("satRoute.csv", newline="", encoding="utf-8") as satRoute:
-        reader = csv.DictReader(satRoute)
-        for row in reader:
-            xNav, yNav, zNav = float(row["x"]), float(row["y"]), float(row["z"])
-            navPos = np.array([xNav, yNav, zNav])
-
-            hour, minute = map(int, row["time"].split(":"))
-            t = ts.utc(now.year, now.month, now.day, hour, minute, 0)
-
-            for sat in satellites:
-                gpsSatPos = np.array(sat.at(t).position.km)
-
-                satsVector = gpsSatPos - navPos
-                earthVector = -navPos
 
-                cosElevation = np.dot(satsVector, earthVector) / (np.linalg.norm(satsVector) * np.linalg.norm(earthVector))
-                el = np.degrees(np.arccos(cosElevation))
+def createSatRoute(tleFile="tleFiles/omerTle.txt", output="satRoute.csv", times=None, timeFormat="%H:%M"):
+    satellite = load.tle_file(tleFile, ts=timescale())[0]
+    if times is None:
+        times = dayTimes()
 
-                if el >= minElevation and el <= maxElevation:
-                    dis = np.linalg.norm(satsVector)
-                    xGps, yGps, zGps = gpsSatPos
+    if isEphemeris(output):
+        # קובץ בינארי: בלוק (1, times, 3) ב-GCRS שנקרא אחר כך דרך memmap
+        writeEphemeris(output, satellite.at(times).xyz.km.T, times, "gcrs", [satellite.model.satnum], [satellite.name])
+        print(f"{output} created")
+        return
 
-                    results.append(
-                        {"time": row["time"], "sat name": sat.name, "x": xGps, "y": yGps, "z": zGps, "el": el, "dis": dis}
-                    )
+    x, y, z = satellite.at(times).xyz.km
+    rows = [
+        {"time": label, "x": x[i], "y": y[i], "z": z[i]} for i, label in enumerate(times.utc_strftime(timeFormat))
+    ]
 
-    with open("visibleSatsForSat.csv", "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["time", "sat name", "x", "y", "z", "el", "dis"])
+    with open(output, "w", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=["time", "x", "y", "z"])
         writer.writeheader()
-        writer.writerows(results)
-
-    print("visibleSatsForSat.csv created")
+        writer.writerows(rows)
 
+    print(f"{csvfile.name} created")
 
-createSatRoute()
-measureVisibleSats()
 
+def readSatRoute(routeFile="satRoute.csv"):
+    with open(routeFile, newline="", encoding="utf-8") as satRoute:
+        rows = list(csv.DictReader(satRoute))
+    labels = [row["time"] for row in rows]
+    positions = np.array([[float(row["x"]), float(row["y"]), float(row["z"])] for row in rows]).reshape(-1, 3)
+    return labels, positions
+
+
+def loadRoute(routeFile="satRoute.csv"):
+    """(labels, positions (T, 3) GCRS km, times) of a route CSV or ephemeris file."""
+    if isEphemeris(routeFile):
+        eph = EphemerisFile(routeFile)
+        if eph.frame != "gcrs":
+            raise ValueError(f"{routeFile}: route positions must be in gcrs, not {eph.frame}")
+        times = eph.times(timescale())
+        return times.utc_strftime(ISO_FORMAT), eph.positions[0], times
+    labels, positions = readSatRoute(routeFile)
+    return labels, positions, routeTimes(labels)
+
+
+def routeTimes(labels):
+    if labels and "T" not in labels[0]:
+        hours, minutes = np.array([label.split(":") for label in labels], dtype=int).T
+        day = today()
+        return timescale().utc(day.year, day.month, day.day, hours, minutes, 0)
+    dates = [datetime.strptime(label, ISO_FORMAT).replace(tzinfo=timezone.utc) for label in labels]
+    return timescale().from_datetimes(dates)
+
+
+def gnssPositions(satellites, times):
+    # כל לוויין מחושב פעם אחת על כל מערך הזמנים -> (sats, times, 3) GCRS בק"מ
+    return np.stack([sat.at(times).position.km.T for sat in satellites]).reshape(len(satellites), len(times), 3)
+
+
+def earthBlocks(userPos, satPos, earthRadius=EARTH_RADIUS):
+    # הנקודה הקרובה ביותר למרכז כדור הארץ על הקטע משתמש -> לוויין
+    direction = satPos - userPos
+    u = -np.einsum("stc,tc->st", direction, userPos) / np.einsum("stc,stc->st", direction, direction)
+    closest = userPos + np.clip(u, 0, 1)[..., None] * direction
+    return np.linalg.norm(closest, axis=-1) < earthRadius
+
+
+def spaceVisibility(userPos, satPos, minElevation, maxElevation, occultation=False):
+    """Off-nadir angle and range from a user in orbit (T, 3) to every satellite (S, T, 3)."""
+    satsVector = satPos - userPos
+    earthVector = -userPos
+
+    dis = np.linalg.norm(satsVector, axis=-1)
+    cosElevation = np.einsum("stc,tc->st", satsVector, earthVector) / (dis * np.linalg.norm(earthVector, axis=-1))
+    el = np.degrees(np.arccos(cosElevation))
+
+    visible = (el >= minElevation) & (el <= maxElevation)
+    if occultation:
+        visible &= ~earthBlocks(userPos, satPos)
+    return el, dis, visible
+
+
+def measureVisibleSats(
+    minElevation=20,
+    maxElevation=90,
+    tleFile="tleFiles/Gps.txt",
+    routeFile="satRoute.csv",
+    output="visibleSatsForSat.csv",
+    userTle=None,
+    occultation=False,
+):
+    satellites = load.tle_file(tleFile, ts=timescale())
+    if userTle is None:
+        labels, route, times = loadRoute(routeFile)
+    else:
+        times = dayTimes()
+        labels = times.utc_strftime("%H:%M")
+        route = load.tle_file(userTle, ts=timescale())[0].at(times).position.km.T
+
+    satPos = gnssPositions(satellites, times)
+    el, dis, visible = spaceVisibility(route, satPos, minElevation, maxElevation, occultation)
+
+    # זמנים ושמות לוויינים נשמרים כאינדקסים למילון; CSV מפענח אותם חזרה
+    columns = [("time", np.int32), ("sat name", np.int32)] + [(name, np.float64) for name in ("x", "y", "z", "el", "dis")]
+    dictionaries = {"time": labels, "sat name": [sat.name for sat in satellites]}
+
+    # סדר השורות כמו קודם: לפי זמן ואז לפי סדר הלוויינים בקובץ
+    row, index = np.nonzero(visible.T)
+    with ColumnWriter(output, columns, dictionaries) as writer:
+        gpsSatPos = satPos[index, row]
+        writer.write(
+            **{"time": row, "sat name": index, "x": gpsSatPos[:, 0], "y": gpsSatPos[:, 1], "z": gpsSatPos[:, 2]},
+            el=el[index, row],
+            dis=dis[index, row],
+        )
+
+    print(f"{output} created")
+
+
+def plotVisibleSats(input="visibleSatsForSat.csv"):
+    import matplotlib.pyplot as plt
 
-def plotVisibleSats():
     minuteCounts = Counter()
 
-    with open("visibleSatsForSat.csv", newline="", encoding="utf-8") as f:
+    with open(input, newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
             time = row["time"]
@@ -95,4 +163,7 @@ def plotVisibleSats():
     plt.show()
 
 
-plotVisibleSats()
+if __name__ == "__main__":
+    createSatRoute()
+    measureVisibleSats()
+    plotVisibleSats()
@@ -0,0 +1,124 @@
+import numpy as np
+from propagation import gmstAngles, propagateSatellites, sgp4Times, temeToItrs
+from visibleSats import elevationsFrom
+
+GOLDEN = (np.sqrt(5) - 1) / 2
+
+
+class PassFinder:
+    """Batched rise/culminate/set search for many satellites and one observer.
+
+    Elevations are sampled every `coarseStep` seconds, then every change of
+    the visibility window (min <= el <= max) between two samples is refined
+    by bisection to `tolerance` seconds. All brackets of all satellites are
+    refined together, one SGP4 call per satellite per iteration.
+    """
+
+    def __init__(self, satellites, user, ts, minElevation, maxElevation=90, coarseStep=300, tolerance=0.1):
+        self.satellites = satellites
+        self.user = user
+        self.ts = ts
+        self.minElevation = minElevation
+        self.maxElevation = maxElevation
+        self.coarseStep = coarseStep
+        self.tolerance = tolerance / 86400
+
+    def elevations(self, satIndex, tt):
+        # גובה ללוויין satIndex[i] בזמן tt[i] (TT Julian date), קריאת sgp4 אחת לכל לוויין
+        times = self.ts.tt_jd(tt)
+        jd, fr = sgp4Times(times)
+        order = np.argsort(satIndex, kind="stable")
+        indexes, starts = np.unique(satIndex[order], return_index=True)
+
+        rTeme = np.empty((len(tt), 3))
+        for index, first, last in zip(indexes, starts, np.append(starts[1:], len(order))):
+            mine = order[first:last]
+            errors, rTeme[mine], v = self.satellites[index].model.sgp4_array(jd[mine], fr[mine])
+        return elevationsFrom(temeToItrs(rTeme, gmstAngles(times)), self.user)
+
+    def visible(self, elevations):
+        return (elevations >= self.minElevation) & (elevations <= self.maxElevation)
+
+    def find(self, t0, t1, workers=None, pool=None):
+        """Return one (P, 4) array per satellite: rise, culmination, set (TT JD) and peak elevation.
+
+        Intervals already open at `t0` or still open at `t1` are clipped to the window.
+        """
+        start, end = t0.tt, t1.tt
+        count = max(2, int(np.ceil((end - start) * 86400 / self.coarseStep)) + 1)
+        grid = np.linspace(start, end, count)
+        with propagateSatellites(self.satellites, self.ts.tt_jd(grid), workers=workers, pool=pool) as positions:
+            coarse = elevationsFrom(positions.array, self.user)
+        visible = self.visible(coarse)
+
+        # כל שינוי במצב הנראות בין שתי דגימות הוא סוגר לחיפוש בינארי
+        satIndex, sample = np.nonzero(visible[:, 1:] != visible[:, :-1])
+        crossings = self.bisect(satIndex, grid[sample], grid[sample + 1], visible[satIndex, sample])
+
+        passes = []
+        for index in range(len(self.satellites)):
+            edges = np.sort(crossings[satIndex == index])
+            if visible[index, 0]:
+                edges = np.concatenate([[start], edges])
+            if visible[index, -1]:
+                edges = np.concatenate([edges, [end]])
+            passes.append(edges.reshape(-1, 2))
+
+        return self.culminate(passes, grid, coarse)
+
+    def bisect(self, satIndex, lo, hi, visibleAtLo):
+        lo, hi = lo.copy(), hi.copy()
+        while len(lo) and np.max(hi - lo) > self.tolerance:
+            mid = (lo + hi) / 2
+            sameAsLo = self.visible(self.elevations(satIndex, mid)) == visibleAtLo
+            lo = np.where(sameAsLo, mid, lo)
+            hi = np.where(sameAsLo, hi, mid)
+        return (lo + hi) / 2
+
+    def culminate(self, passes, grid, coarse):
+        # חיפוש יחס הזהב על השיא, מתחיל סביב הדגימה הגבוהה בכל מעבר
+        satIndex = np.concatenate([np.full(len(p), i) for i, p in enumerate(passes)]).astype(int)
+        intervals = np.concatenate(passes) if satIndex.size else np.empty((0, 2))
+        lo, hi = intervals[:, 0].copy(), intervals[:, 1].copy()
+
+        for i, (index, (rise, set_)) in enumerate(zip(satIndex, intervals)):
+            inside = np.nonzero((grid >= rise) & (grid <= set_))[0]
+            if len(inside):
+                peak = inside[np.argmax(coarse[index, inside])]
+                lo[i] = max(rise, grid[max(peak - 1, 0)])
+                hi[i] = min(set_, grid[min(peak + 1, len(grid) - 1)])
+
+        a = hi - GOLDEN * (hi - lo)
+        b = lo + GOLDEN * (hi - lo)
+        if len(lo):
+            elevationA, elevationB = self.elevations(satIndex, a), self.elevations(satIndex, b)
+        while len(lo) and np.max(hi - lo) > self.tolerance:
+            # נקודה אחת שורדת מכל איטרציה, כך שמחשבים רק נקודה חדשה אחת
+            higherAtA = elevationA > elevationB
+            hi = np.where(higherAtA, b, hi)
+            lo = np.where(higherAtA, lo, a)
+            probe = np.where(higherAtA, hi - GOLDEN * (hi - lo), lo + GOLDEN * (hi - lo))
+            elevationProbe = self.elevations(satIndex, probe)
+
+            a, b = np.where(higherAtA, probe, b), np.where(higherAtA, a, probe)
+            elevationA, elevationB = (
+                np.where(higherAtA, elevationProbe, elevationB),
+                np.where(higherAtA, elevationA, elevationProbe),
+            )
+
+        peak = (lo + hi) / 2
+        peakElevation = self.elevations(satIndex, peak) if len(peak) else peak
+        table = np.column_stack([intervals[:, 0], peak, intervals[:, 1], peakElevation])
+        return [table[satIndex == index] for index in range(len(passes))]
+
+
+def visibilityTable(passes, times):
+    """(sats, times) visibility mask derived from pass intervals, e.g. for the per-minute CSV."""
+    tt = np.atleast_1d(times.tt)
+    visible = np.zeros((len(passes), len(tt)), dtype=bool)
+    for index, table in enumerate(passes):
+        if len(table) == 0:
+            continue
+        last = np.searchsorted(table[:, 0], tt, side="right") - 1
+        visible[index] = (last >= 0) & (tt <= table[np.maximum(last, 0), 2])
+    return visible
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import time
+import numpy as np
+from propagation import gmstAngles, itrsToLatLon, propagateSatrecs, sgp4Times
+
+# כמה צעדי זמן מחושבים בכל מעבר של ה-thread הרקע
+BLOCK = 256
+
+
+class SimulationClock:
+    """Simulated time running from `start` to `end` (TT Julian dates) at `speed` x wall clock.
+
+    The clock wraps around at `end`. `step` is the sample spacing in seconds
+    of the precomputed window, so `index()` is the frame to show.
+    """
+
+    def __init__(self, start, end, speed=1.0, step=60):
+        self.start = start
+        self.end = end
+        self.speed = speed
+        self.step = step / 86400
+        self.offset = 0.0
+        self.playing = False
+        self.lastWall = None
+
+    def play(self):
+        self.playing = True
+        self.lastWall = time.perf_counter()
+
+    def pause(self):
+        self.advance()
+        self.playing = False
+
+    def advance(self):
+        if not self.playing:
+            return
+        wall = time.perf_counter()
+        self.offset = (self.offset + (wall - self.lastWall) * self.speed / 86400) % (self.end - self.start)
+        self.lastWall = wall
+
+    def seek(self, fraction):
+        self.offset = min(max(fraction, 0.0), 1.0) * (self.end - self.start)
+        self.lastWall = time.perf_counter()
+
+    @property
+    def fraction(self):
+        return self.offset / (self.end - self.start)
+
+    def index(self):
+        self.advance()
+        return int(self.offset / self.step)
+
+
+class Playback:
+    """Subpoints of a fixed set of satellites over a time window, precomputed into a memmap.
+
+    Frames are stored time-major as float32 (times, sats, 2) lat/lon, so
+    showing a frame is one contiguous slice whatever the satellite count.
+    `compute` fills the file in blocks on a background thread; until it is
+    done playback is limited to the frames already in `ready`.
+    """
+
+    def __init__(self, ts, satrecs, ids, names, start, hours, speed=1000.0, step=60):
+        count = max(2, int(round(hours * 3600 / step)) + 1)
+        self.times = ts.tt_jd(start.tt + np.arange(count) * step / 86400)
+        self.clock = SimulationClock(self.times.tt[0], self.times.tt[-1] + step / 86400, speed, step)
+        self.satrecs = satrecs
+        self.ids = ids
+        self.names = names
+        self.source = None
+        self.ready = 0
+
+        handle, self.path = tempfile.mkstemp(suffix=".subpoints")
+        os.close(handle)
+        self.frames = np.memmap(self.path, dtype=np.float32, mode="w+", shape=(count, len(ids), 2))
+
+    @classmethod
+    def fromEphemeris(cls, ts, ephemeris, ids, speed=1000.0):
+        """Play an ITRS `EphemerisFile` instead of propagating; `ids` are the catalog ids of its satellites."""
+        if ephemeris.frame != "itrs":
+            raise ValueError(f"playback needs an itrs ephemeris, not {ephemeris.frame}")
+        hours = (ephemeris.shape[1] - 1) * ephemeris.step / 3600
+        playback = cls(ts, None, ids, ephemeris.names, ephemeris.times(ts)[0], hours, speed, ephemeris.step)
+        playback.source = ephemeris
+        return playback
+
+    def compute(self, task=None):
+        for start in range(0, len(self.times), BLOCK):
+            if task is not None:
+                task.check()
+            times = self.times[start : start + BLOCK]
+            end = start + len(times.tt)
+            if self.source is not None:
+                # מקובץ אפמרידות: רק המרה לקו רוחב/אורך, בלי sgp4
+                positions = self.source.positions[:, start:end]
+            else:
+                jd, fr = sgp4Times(times)
+                positions = propagateSatrecs(self.satrecs, jd, fr, gmstAngles(times))
+            lats, lons = itrsToLatLon(positions)
+            self.frames[start:end, :, 0] = lats.T
+            self.frames[start:end, :, 1] = lons.T
+            self.ready = end
+            if task is not None:
+                task.progress(end, len(self.times))
+        self.frames.flush()
+        return self
+
+    def frame(self):
+        """(index, lats, lons) for the current clock time, or None before the first block is ready."""
+        if self.ready == 0:
+            return None
+        index = min(self.clock.index(), self.ready - 1)
+        return index, self.frames[index, :, 0], self.frames[index, :, 1]
+
+    def close(self):
+        self.frames = None
+        if self.source is not None:
+            self.source.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            # ב-Windows הקובץ נעול כל עוד ה-thread הרקע עוד כותב אליו
+            pass
@@ -0,0 +1,206 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from sgp4.api import WGS72, WGS72OLD, WGS84, Satrec, SatrecArray
+from skyfield.api import wgs84
+from skyfield.constants import DAY_S
+from skyfield.sgp4lib import theta_GMST1982
+
+# כמה צעדי זמן מחשבים בבת אחת בכל worker, כדי שהזיכרון של sgp4 יישאר חסום
+TIME_BLOCK = 4096
+# מודל הכבידה של Satrec לפי mu שלו, כדי לבנות אותו מחדש ב-worker
+GRAVITY = {398600.79964: WGS72OLD, 398600.8: WGS72, 398600.5: WGS84}
+# מתחת למספר הזה של (לוויין, זמן) החישוב בתהליך עצמו מהיר מהקמת pool (במיוחד ב-spawn)
+MIN_POOL_SAMPLES = 2_000_000
+
+
+class SharedPositions:
+    """(sats, times, 3) positions in km, backed by a shared memory block.
+
+    Other processes can attach to the same block by `name`; call `close()`
+    (or use it as a context manager) once the array is no longer needed.
+    """
+
+    def __init__(self, shape, name=None):
+        size = int(np.prod(shape)) * np.dtype(np.float64).itemsize
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.shape = tuple(shape)
+        self.array = np.ndarray(self.shape, dtype=np.float64, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def satrecElements(satrec):
+    # Satrec לא עובר pickle; ל-worker שולחים את איברי sgp4init המלאים ולא טקסט TLE מעוגל
+    return (
+        GRAVITY[satrec.mu],
+        satrec.operationmode,
+        satrec.satnum,
+        satrec.jdsatepoch - 2433281.5 + satrec.jdsatepochF,
+        satrec.bstar,
+        satrec.ndot,
+        satrec.nddot,
+        satrec.ecco,
+        satrec.argpo,
+        satrec.inclo,
+        satrec.mo,
+        satrec.no_kozai,
+        satrec.nodeo,
+    )
+
+
+def satrecFromElements(elements):
+    satrec = Satrec()
+    satrec.sgp4init(*elements)
+    return satrec
+
+
+def sgp4Times(times):
+    # sgp4 מצפה ל-UTC, בדיוק כמו ש-skyfield מזין אותו
+    return times.whole, times.tai_fraction - times._leap_seconds() / DAY_S
+
+
+def gmstAngles(times):
+    theta, _ = theta_GMST1982(times.whole, times.ut1_fraction)
+    return theta
+
+
+def temeToItrs(rTeme, theta):
+    # TEME -> ITRS: סיבוב אחד סביב ציר z לכל זמן
+    cos, sin = np.cos(theta), np.sin(theta)
+    rItrs = np.empty_like(rTeme)
+    rItrs[..., 0] = cos * rTeme[..., 0] + sin * rTeme[..., 1]
+    rItrs[..., 1] = cos * rTeme[..., 1] - sin * rTeme[..., 0]
+    rItrs[..., 2] = rTeme[..., 2]
+    return rItrs
+
+
+def itrsToLatLon(rItrs):
+    # קו רוחב גאודטי של WGS84, באותה איטרציה ש-skyfield משתמש בה
+    a = wgs84.radius.km
+    e2 = wgs84._e2
+    x, y, z = rItrs[..., 0], rItrs[..., 1], rItrs[..., 2]
+    R = np.hypot(x, y)
+    lat = np.arctan2(z, R)
+    for iteration in range(3):
+        sinLat = np.sin(lat)
+        aC = a / np.sqrt(1.0 - e2 * sinLat * sinLat)
+        lat = np.arctan2(z + aC * e2 * sinLat, R)
+    return np.degrees(lat), np.degrees(np.arctan2(y, x))
+
+
+def propagateSatrecs(satrecs, jd, fr, theta=None, out=None):
+    if out is None:
+        out = np.empty((len(satrecs), len(jd), 3))
+    if len(satrecs) == 0:
+        return out
+
+    sats = satrecs if isinstance(satrecs, SatrecArray) else SatrecArray(satrecs)
+    for start in range(0, len(jd), TIME_BLOCK):
+        end = start + TIME_BLOCK
+        errors, r, v = sats.sgp4(jd[start:end], fr[start:end])
+        out[:, start:end] = r if theta is None else temeToItrs(r, theta[start:end])
+    return out
+
+
+def _propagateChunk(target, shape, start, elements, jd, fr, theta):
+    # target הוא ("shm", שם הבלוק) או ("file", נתיב קובץ אפמרידות)
+    kind, name = target
+    if kind == "file":
+        from ephemerisFile import EphemerisFile
+
+        positions = EphemerisFile(name, mode="r+")
+        array = positions.positions
+    else:
+        positions = SharedPositions(shape, name=name)
+        array = positions.array
+    try:
+        satrecs = [satrecFromElements(satElements) for satElements in elements]
+        propagateSatrecs(satrecs, jd, fr, theta, out=array[start : start + len(elements)])
+    finally:
+        positions.close()
+    return len(elements)
+
+
+def propagationPool(workers=None):
+    """A process pool to pass as `pool=` to many propagate() calls, e.g. every chunk of one CLI run.
+
+    The worker processes only start on the first job that is big enough to use them.
+    """
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+
+
+def propagate(satrecs, times, frame="itrs", workers=None, chunkSize=None, out=None, pool=None):
+    """Propagate sgp4 Satrec objects over a skyfield Time array.
+
+    Returns a `SharedPositions` with shape (sats, times, 3) in km, in the
+    ITRS (Earth fixed) or raw TEME frame. Jobs of at least
+    `MIN_POOL_SAMPLES` satellite-times are split into chunks of satellites
+    over a process pool (`pool`, or a new one of `workers` processes);
+    smaller jobs and `workers=1` propagate in this process. With `out` (an
+    `EphemerisFile` opened for writing) the workers write straight into that
+    file and it is returned instead.
+    """
+    if frame not in ("itrs", "teme"):
+        raise ValueError(f"unknown frame: {frame}")
+    jd, fr = sgp4Times(times)
+    jd, fr = np.atleast_1d(jd), np.atleast_1d(fr)
+    theta = np.atleast_1d(gmstAngles(times)) if frame == "itrs" else None
+
+    workers = workers or os.cpu_count() or 1
+    if out is None:
+        positions = SharedPositions((len(satrecs), len(jd), 3))
+        array, target = positions.array, ("shm", positions.name)
+    else:
+        if out.shape != (len(satrecs), len(jd), 3) or out.frame != frame:
+            raise ValueError(f"{out.path} does not match {len(satrecs)} satellites x {len(jd)} times in {frame}")
+        positions = out
+        array, target = out.positions, ("file", out.path)
+
+    if workers == 1 or len(satrecs) < 2 or len(satrecs) * len(jd) < MIN_POOL_SAMPLES:
+        propagateSatrecs(satrecs, jd, fr, theta, out=array)
+        return positions
+
+    if chunkSize is None:
+        chunkSize = max(1, -(-len(satrecs) // (workers * 4)))
+    elements = [satrecElements(satrec) for satrec in satrecs]
+
+    executor = pool if pool is not None else propagationPool(workers)
+    try:
+        futures = [
+            executor.submit(_propagateChunk, target, array.shape, start, elements[start : start + chunkSize], jd, fr, theta)
+            for start in range(0, len(satrecs), chunkSize)
+        ]
+        for future in futures:
+            future.result()
+    except BaseException:
+        if out is None:
+            positions.close()
+        raise
+    finally:
+        if pool is None:
+            executor.shutdown()
+    return positions
+
+
+def propagateSatellites(satellites, times, frame="itrs", workers=None, chunkSize=None, out=None, pool=None):
+    return propagate([sat.model for sat in satellites], times, frame, workers, chunkSize, out, pool)
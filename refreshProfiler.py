@@ -0,0 +1,115 @@
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+
+
+class RefreshProfiler:
+    """Per-stage timers, rolling statistics and adaptive scheduling for a periodic refresh.
+
+    A tick is wrapped in `beginTick()` / `endTick(interval)` and its parts in
+    `stage(name)`. `endTick` returns the delay until the next slot of a fixed
+    `interval` grid: a tick that overruns its slot skips the slots it
+    covered instead of queueing them up behind it.
+    """
+
+    def __init__(self, window=120, minIdle=10):
+        self.window = window
+        self.minIdle = minIdle
+        self.stages = {}
+        self.ticks = deque(maxlen=window)
+        self.skipped = 0
+        self.current = None
+        self.tickStart = None
+        self.profile = None
+        self.captureTicks = 0
+        self.captureOutput = None
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            # שלבים מחוץ לטיק (למשל לחיצה בטבלה) לא נספרים
+            if self.current is not None:
+                self.current[name] = self.current.get(name, 0.0) + time.perf_counter() - start
+
+    def beginTick(self):
+        self.current = {}
+        self.tickStart = time.perf_counter()
+        if self.profile is not None:
+            self.profile.enable()
+
+    def endTick(self, interval):
+        """Close the tick and return the delay in ms until the next one."""
+        if self.profile is not None:
+            self.profile.disable()
+            self.captureTicks -= 1
+            if self.captureTicks <= 0:
+                self.stopCapture()
+
+        elapsed = time.perf_counter() - self.tickStart
+        for name, seconds in self.current.items():
+            self.stages.setdefault(name, deque(maxlen=self.window)).append(seconds)
+        self.ticks.append(elapsed)
+        self.current = None
+
+        elapsedMs = elapsed * 1000
+        # מרווח 0 או שלילי הופך לרשת של minIdle, ולא לחלוקה באפס
+        interval = max(interval, self.minIdle)
+        missed = int(elapsedMs // interval)
+        self.skipped += missed
+        # הטיק הבא בתחילת המשבצת הפנויה הבאה, עם זמן מינימלי לאירועי ממשק
+        return max(self.minIdle, int(interval * (missed + 1) - elapsedMs))
+
+    def summary(self):
+        """{stage: (mean, p95, max)} in ms over the rolling window, "tick" for whole ticks."""
+        rows = {"tick": self.ticks, **self.stages}
+        return {
+            name: (np.mean(values) * 1000, np.percentile(values, 95) * 1000, np.max(values) * 1000)
+            for name, values in rows.items()
+            if len(values)
+        }
+
+    def report(self):
+        summary = self.summary()
+        if "tick" not in summary:
+            return ""
+        parts = [f"{name} {mean:.1f}" for name, (mean, p95, peak) in summary.items() if name != "tick"]
+        mean, p95, peak = summary["tick"]
+        return f"tick {mean:.1f} ms (p95 {p95:.1f}) | " + ", ".join(parts) + f" | skipped {self.skipped}"
+
+    def startCapture(self, ticks=20, output="refreshProfile.txt"):
+        # cProfile ו-tracemalloc רק לטיקים הבאים, כדי לא להאט את הריצה הרגילה
+        self.profile = cProfile.Profile()
+        self.captureTicks = ticks
+        self.captureOutput = output
+        tracemalloc.start()
+
+    @property
+    def capturing(self):
+        return self.profile is not None
+
+    def stopCapture(self, top=25):
+        if self.profile is None:
+            return
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        text = io.StringIO()
+        pstats.Stats(self.profile, stream=text).sort_stats("cumulative").print_stats(top)
+        text.write(f"\ntracemalloc: current {current / 2**20:.1f} MB, peak {peak / 2**20:.1f} MB\n")
+        for stat in snapshot.statistics("lineno")[:top]:
+            text.write(f"{stat}\n")
+        text.write(f"\n{self.report()}\n")
+
+        with open(self.captureOutput, "w") as f:
+            f.write(text.getvalue())
+        print(f"{self.captureOutput} created")
+        self.profile = None
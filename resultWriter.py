@@ -0,0 +1,152 @@
+import csv
+import json
+import os
+import zipfile
+import numpy as np
+
+FORMATS = {".csv": "csv", ".npz": "npz", ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+
+def outputFormat(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"unsupported output format: {path} (use {', '.join(FORMATS)})")
+    return FORMATS[extension]
+
+
+class ColumnWriter:
+    """Streams rows to disk in fixed-size columnar batches.
+
+    `columns` is a list of (name, dtype). Columns listed in `dictionaries`
+    hold integer indices into that list of names (satellites, observers,
+    time labels), so large outputs never repeat the strings. npz, Parquet
+    and Arrow files store the indices plus the dictionaries; CSV decodes
+    them back to names. At most `batchRows` rows are kept in memory.
+    """
+
+    def __init__(self, path, columns, dictionaries=None, batchRows=65536, format=None):
+        self.path = path
+        self.columns = [(name, np.dtype(dtype)) for name, dtype in columns]
+        self.dictionaries = {name: list(values) for name, values in (dictionaries or {}).items()}
+        self.batchRows = batchRows
+        self.format = format or outputFormat(path)
+        self.pending = {name: [] for name, dtype in self.columns}
+        self.pendingRows = 0
+        self.batches = 0
+        self.rows = 0
+        self.open()
+
+    def open(self):
+        if self.format == "csv":
+            self.file = open(self.path, "w", newline="", encoding="utf-8")
+            self.csv = csv.writer(self.file)
+            self.csv.writerow([name for name, dtype in self.columns])
+        elif self.format == "npz":
+            self.zip = zipfile.ZipFile(self.path, "w", zipfile.ZIP_STORED, allowZip64=True)
+        else:
+            try:
+                import pyarrow as pa
+            except ImportError:
+                raise ImportError(f"pyarrow is required for {self.format} output") from None
+
+            metadata = {"dictionaries": json.dumps(self.dictionaries)}
+            self.schema = pa.schema([(name, pa.from_numpy_dtype(dtype)) for name, dtype in self.columns], metadata=metadata)
+            if self.format == "parquet":
+                import pyarrow.parquet as pq
+
+                self.arrow = pq.ParquetWriter(self.path, self.schema)
+            else:
+                self.arrow = pa.ipc.new_file(self.path, self.schema)
+
+    def write(self, **values):
+        lengths = {len(np.atleast_1d(values[name])) for name, dtype in self.columns}
+        if len(lengths) != 1:
+            raise ValueError("all columns must have the same length")
+        for name, dtype in self.columns:
+            self.pending[name].append(np.asarray(values[name], dtype=dtype).ravel())
+        self.pendingRows += lengths.pop()
+        if self.pendingRows >= self.batchRows:
+            self.flush()
+
+    def flush(self):
+        if self.pendingRows == 0:
+            return
+        batch = {name: np.concatenate(self.pending[name]) for name, dtype in self.columns}
+        for start in range(0, self.pendingRows, self.batchRows):
+            self.writeBatch({name: values[start : start + self.batchRows] for name, values in batch.items()})
+        self.pending = {name: [] for name, dtype in self.columns}
+        self.rows += self.pendingRows
+        self.pendingRows = 0
+
+    def writeBatch(self, batch):
+        if self.format == "csv":
+            decoded = []
+            for name, dtype in self.columns:
+                values = batch[name].tolist()
+                if name in self.dictionaries:
+                    names = self.dictionaries[name]
+                    values = [names[i] for i in values]
+                decoded.append(values)
+            self.csv.writerows(zip(*decoded))
+        elif self.format == "npz":
+            for name, dtype in self.columns:
+                self.writeArray(f"{name}/{self.batches:06d}", batch[name])
+        else:
+            import pyarrow as pa
+
+            self.arrow.write_table(pa.table(batch, schema=self.schema))
+        self.batches += 1
+
+    def writeArray(self, key, values):
+        with self.zip.open(f"{key}.npy", "w", force_zip64=True) as f:
+            np.lib.format.write_array(f, values, allow_pickle=False)
+
+    def close(self):
+        self.flush()
+        if self.format == "csv":
+            self.file.close()
+        elif self.format == "npz":
+            self.writeArray("__columns__", np.array([name for name, dtype in self.columns]))
+            for name, values in self.dictionaries.items():
+                self.writeArray(f"__dictionary__/{name}", np.array(values, dtype=str))
+            self.zip.close()
+        else:
+            self.arrow.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def readColumns(path):
+    """Read a file written by ColumnWriter back into ({column: array}, {column: names})."""
+    format = outputFormat(path)
+    if format == "npz":
+        with np.load(path) as data:
+            names = data["__columns__"].tolist()
+            keys = sorted(key for key in data.files if "/" in key and not key.startswith("__"))
+            columns = {name: np.concatenate([data[k] for k in keys if k.split("/")[0] == name] or [np.empty(0)]) for name in names}
+            dictionaries = {
+                key.split("/", 1)[1]: data[key].tolist() for key in data.files if key.startswith("__dictionary__/")
+            }
+        return columns, dictionaries
+
+    if format == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        return {name: np.array(values) for name, values in zip(rows[0], zip(*rows[1:]))}, {}
+
+    import pyarrow as pa
+
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path)
+    else:
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+    metadata = table.schema.metadata or {}
+    dictionaries = json.loads(metadata.get(b"dictionaries", b"{}"))
+    return {name: table.column(name).to_numpy() for name in table.column_names}, dictionaries
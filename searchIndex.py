@@ -0,0 +1,61 @@
+import numpy as np
+from collections import defaultdict
+
+GRAM = 3
+
+
+class SearchIndex:
+    """Substring search over satellite names, NORAD ids and international designators.
+
+    Every searchable string is split into 1- to 3-character n-grams with a
+    sorted posting list of satellite indexes each. A query intersects the
+    posting lists of its trigrams and only verifies the few candidates left.
+    Typing that extends the previous query narrows the previous result.
+    """
+
+    def __init__(self, catalog):
+        self.texts = []
+        for name, satnum, designator in zip(catalog.names.tolist(), catalog.satnums.tolist(), catalog.designators.tolist()):
+            # \x00 מפריד בין השדות, כך שאף n-gram לא חוצה שני שדות
+            self.texts.append(f"{name}\x00{satnum}\x00{designator}".lower())
+
+        postings = defaultdict(list)
+        for index, text in enumerate(self.texts):
+            grams = set()
+            for size in range(1, GRAM + 1):
+                for start in range(len(text) - size + 1):
+                    gram = text[start : start + size]
+                    if "\x00" not in gram:
+                        grams.add(gram)
+            for gram in grams:
+                postings[gram].append(index)
+        self.postings = {gram: np.array(indexes, dtype=np.int32) for gram, indexes in postings.items()}
+
+        self.all = np.arange(len(self.texts), dtype=np.int32)
+        self.lastQuery = ""
+        self.lastResult = self.all
+
+    def query(self, text):
+        """Return the sorted catalog ids of satellites whose name, NORAD id or designator contains `text`."""
+        text = text.strip().lower()
+        if text == "":
+            result = self.all
+        elif len(text) <= GRAM:
+            result = self.postings.get(text, self.all[:0])
+        else:
+            if self.lastQuery and self.lastQuery in text:
+                candidates = self.lastResult
+            else:
+                candidates = self.all
+            lists = sorted(
+                (self.postings.get(text[start : start + GRAM], self.all[:0]) for start in range(len(text) - GRAM + 1)),
+                key=len,
+            )
+            for posting in lists:
+                candidates = np.intersect1d(candidates, posting, assume_unique=True)
+                if len(candidates) == 0:
+                    break
+            result = np.array([i for i in candidates if text in self.texts[i]], dtype=np.int32)
+
+        self.lastQuery, self.lastResult = text, result
+        return result
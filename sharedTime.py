@@ -0,0 +1,9 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def timescale():
+    """The skyfield Timescale shared by the whole process, created on first use."""
+    from skyfield.api import load
+
+    return load.timescale()
@@ -0,0 +1,170 @@
+import asyncio
+import gzip
+import http.client
+import threading
+import urllib.error
+import urllib.parse
+import zlib
+
+# תשובות ששווה לנסות שוב: עומס או תקלה זמנית בשרת
+RETRY_STATUS = {429, 500, 502, 503, 504}
+REDIRECT_STATUS = {301, 302, 303, 307, 308}
+MAX_REDIRECTS = 5
+
+
+class ConnectionPool:
+    """Idle keep-alive connections per (scheme, host), so later requests to the same server skip the handshake.
+
+    A connection is checked out for one request at a time; the pool itself
+    is locked because separate `run()` calls may share it from different threads.
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.idle = {}
+        self.lock = threading.Lock()
+
+    def get(self, scheme, host):
+        with self.lock:
+            connections = self.idle.get((scheme, host))
+            if connections:
+                return connections.pop(), True
+        connectionClass = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connectionClass(host, timeout=self.timeout), False
+
+    def put(self, scheme, host, connection):
+        with self.lock:
+            self.idle.setdefault((scheme, host), []).append(connection)
+
+    def close(self):
+        with self.lock:
+            for connections in self.idle.values():
+                for connection in connections:
+                    connection.close()
+            self.idle.clear()
+
+
+def _request(connection, path, headers):
+    # רץ ב-thread; התשובה נקראת עד הסוף כדי שאפשר יהיה להשתמש שוב בחיבור
+    connection.request("GET", path, headers=headers)
+    response = connection.getresponse()
+    body = response.read()
+    return response.status, response.reason, response.headers, body, response.will_close
+
+
+class TleFetcher:
+    """Refreshes several `TleStore` groups concurrently.
+
+    Each group is a conditional GET (If-None-Match/If-Modified-Since from the
+    store); by default all requested groups are in flight at once. The
+    keep-alive connection pool lives as long as the fetcher, so the next
+    refresh reuses the connections of the previous one. Network errors and
+    429/5xx answers are retried `retries` times with exponential backoff;
+    `store.timeout` is the socket timeout of every request. A group that
+    cannot be fetched keeps its stored copy, or is seeded from the bundled
+    file when the store has none. The store's SQLite writes and TLE parsing
+    run in worker threads, off the event loop.
+    """
+
+    def __init__(self, store, concurrency=None, retries=3, backoff=0.5):
+        self.store = store
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.pool = ConnectionPool(store.timeout)
+
+    def run(self, choices=None, force=False, onProgress=None):
+        """Fetch the groups from a non-async thread; returns {group: status or exception}."""
+        return asyncio.run(self.fetchAll(choices, force, onProgress))
+
+    def close(self):
+        self.pool.close()
+
+    async def fetchAll(self, choices=None, force=False, onProgress=None):
+        choices = list(self.store.groups if choices is None else choices)
+        semaphore = asyncio.Semaphore(self.concurrency or max(len(choices), 1))
+        results = {}
+
+        async def fetchOne(choice):
+            async with semaphore:
+                try:
+                    results[choice] = await self.fetchGroup(choice, force)
+                except (urllib.error.URLError, OSError, ValueError) as error:
+                    results[choice] = error
+            if onProgress is not None:
+                onProgress(len(results), len(choices))
+
+        await asyncio.gather(*(fetchOne(choice) for choice in choices))
+        return results
+
+    async def fetchGroup(self, choice, force=False):
+        """'fresh' (not due yet), 'not modified' or 'updated'."""
+        info = await asyncio.to_thread(self.store.groupInfo, choice)
+        if not force and not self.store.stale(info):
+            return "fresh"
+
+        url = self.store.url(choice)
+        headers = self.store.conditionalHeaders(url, info)
+        headers["Accept-Encoding"] = "gzip"
+        try:
+            status, responseHeaders, body = await self.get(url, headers)
+            if status == 304:
+                await asyncio.to_thread(self.store.notModified, choice)
+                return "not modified"
+            text = body.decode("utf-8", errors="replace")
+            # פענוח ה-TLE וכתיבה ל-SQLite לא חוסמים את ה-event loop
+            await asyncio.to_thread(self.store.update, choice, url, text, responseHeaders.get("ETag"), responseHeaders.get("Last-Modified"))
+        except (urllib.error.URLError, OSError, ValueError) as error:
+            if info is None:
+                await asyncio.to_thread(self.store.seed, choice)
+            print(f"offline, using stored {choice} TLEs: {error}")
+            raise
+        return "updated"
+
+    async def get(self, url, headers):
+        for redirect in range(MAX_REDIRECTS + 1):
+            status, reason, responseHeaders, body = await self.attempt(url, headers)
+            if status in REDIRECT_STATUS and responseHeaders.get("Location"):
+                url = urllib.parse.urljoin(url, responseHeaders["Location"])
+                continue
+            if status >= 400:
+                raise urllib.error.HTTPError(url, status, reason, responseHeaders, None)
+            if responseHeaders.get("Content-Encoding") == "gzip":
+                try:
+                    body = gzip.decompress(body)
+                except (EOFError, zlib.error) as error:
+                    # גוף קטוע נכשל רק בקבוצה שלו ולא בכל ההורדה
+                    raise ValueError(f"bad gzip body from {url}: {error}") from error
+            return status, responseHeaders, body
+        raise urllib.error.URLError(f"too many redirects: {url}")
+
+    async def attempt(self, url, headers):
+        parts = urllib.parse.urlsplit(url)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        failures = 0
+        while True:
+            connection, reused = self.pool.get(parts.scheme, parts.netloc)
+            retryAfter = 0.0
+            try:
+                status, reason, responseHeaders, body, willClose = await asyncio.to_thread(_request, connection, path, headers)
+            except (http.client.HTTPException, OSError) as error:
+                connection.close()
+                # השרת סגר חיבור keep-alive שחיכה בצד; חיבור חדש הוא לא ניסיון חוזר
+                if reused:
+                    continue
+                failures += 1
+                if failures > self.retries:
+                    raise urllib.error.URLError(error) from error
+            else:
+                if willClose:
+                    connection.close()
+                else:
+                    self.pool.put(parts.scheme, parts.netloc, connection)
+                if status not in RETRY_STATUS or failures >= self.retries:
+                    return status, reason, responseHeaders, body
+                failures += 1
+                try:
+                    retryAfter = min(float(responseHeaders.get("Retry-After", 0)), 30.0)
+                except ValueError:
+                    pass
+            await asyncio.sleep(max(self.backoff * 2 ** (failures - 1), retryAfter))
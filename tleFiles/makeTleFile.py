@@ -1,67 +1,142 @@
-import math
-from datetime import datetime, timezone
-
-
-# חישוב checksum לשורה
-def compute_checksum(line):
-    s = 0
-    for c in line[:68]:  # עמודות 1–68
-        if c.isdigit():
-            s += int(c)
-        elif c == "-":
-            s += 1
-    return s % 10
-
-
-# epoch בפורמט YYDDD.DDDDDDDD
-def datetime_to_tle_epoch(dt):
-    year = dt.year % 100
-    day_of_year = dt.timetuple().tm_yday
-    fraction_of_day = (dt.hour * 3600 + dt.minute * 60 + dt.second + dt.microsecond / 1e6) / 86400
-    return f"{year:02d}{day_of_year:03d}.{fraction_of_day:.8f}"
-
-
-def makeTle():
-    EARTH_RADIUS = 6378
-    mu = 398600.4418  # km^3/s^2
-
-    # פרמטרי מסלול
-    h = 15000
-    a = EARTH_RADIUS + h
-    incl = 55.0
-    ecc = 0.0
-    mean_motion = math.sqrt(mu / a**3) * 86400 / (2 * math.pi)  # rev/day
-
-    # פרמטרי מערכת לוויינים
-    N = 15
-    sat_base_num = 10001
-    rev_number = 1
-
-    # epoch להיום
-    now = datetime.now(timezone.utc)
-    epoch = datetime_to_tle_epoch(now)
-
-    tleList = []
-
-    for i in range(N):
-        sat_num = sat_base_num + i
-        mean_anomaly = (360 / N) * i
-        raan = 0.0
-        arg_perigee = 0.0
-
-        ecc_str = f"{ecc:.7f}".split(".")[1]  # בלי נקודה
-
-        # בונים שורות בפורמט נכון
-        line1 = f"1 {sat_num:05d}U 00000A   {epoch}  .00000000  00000-0  00000-0 0  0000"
-        line2 = f"2 {sat_num:05d} {incl:8.4f} {raan:8.4f} {ecc_str:7s} {arg_perigee:8.4f} {mean_anomaly:8.4f} {mean_motion:11.8f} {rev_number:5d}"
-
-        # מוסיפים checksum
-        line1 = line1[:68] + str(compute_checksum(line1))
-        line2 = line2[:68] + str(compute_checksum(line2))
-
-        tleList.append(f"Ben-{i+1}\n{line1}\n{line2}")
-
-    with open("tleFiles/constellation.txt", "w") as f:
-        f.write("\n".join(tleList))
-
-makeTle()
\ No newline at end of file
+import math
+from collections import namedtuple
+from datetime import datetime, timezone
+from functools import lru_cache
+import numpy as np
+from sgp4.api import Satrec, WGS72
+
+EARTH_RADIUS = 6378
+MU = 398600.4418  # km^3/s^2
+SGP4_EPOCH = datetime(1949, 12, 31, tzinfo=timezone.utc)
+
+# מעטפת אחת של קבוצת לוויינים בתבנית Walker:
+# pattern="delta" פורש את ה-RAAN על 360 מעלות, "star" על 180
+Shell = namedtuple("Shell", "altitude inclination planes perPlane phasing pattern", defaults=(0, "delta"))
+
+# הקבוצה המקורית: 15 לוויינים במישור אחד בגובה 15000 ק"מ
+DEFAULT_SHELLS = (Shell(15000, 55.0, 1, 15),)
+
+
+def parseShell(text):
+    # "altitude,inclination,planes,perPlane[,phasing[,delta|star]]"
+    fields = text.split(",")
+    numbers = [float(fields[0]), float(fields[1]), int(fields[2]), int(fields[3])]
+    if len(fields) > 4:
+        numbers.append(int(fields[4]))
+    return Shell(*numbers, *fields[5:6])
+
+
+# חישוב checksum לשורה
+def compute_checksum(line):
+    s = 0
+    for c in line[:68]:  # עמודות 1–68
+        if c.isdigit():
+            s += int(c)
+        elif c == "-":
+            s += 1
+    return s % 10
+
+
+def computeChecksums(lines):
+    # checksum לכל השורות בבת אחת: ספרות לפי ערכן ו-"-" שווה 1
+    chars = np.frombuffer("".join(line[:68] for line in lines).encode("ascii"), dtype=np.uint8).reshape(-1, 68)
+    chars = chars.astype(np.int64)
+    digits = np.where((chars >= ord("0")) & (chars <= ord("9")), chars - ord("0"), 0)
+    return (digits.sum(axis=1) + (chars == ord("-")).sum(axis=1)) % 10
+
+
+# epoch בפורמט YYDDD.DDDDDDDD
+def datetime_to_tle_epoch(dt):
+    year = dt.year % 100
+    day_of_year = dt.timetuple().tm_yday
+    fraction_of_day = (dt.hour * 3600 + dt.minute * 60 + dt.second + dt.microsecond / 1e6) / 86400
+    return f"{year:02d}{day_of_year + fraction_of_day:012.8f}"
+
+
+def walkerElements(shells):
+    """Mean elements of every satellite in `shells`, as arrays in degrees and rev/day."""
+    inclination, raan, meanAnomaly, meanMotion = [], [], [], []
+    for shell in shells:
+        total = shell.planes * shell.perPlane
+        spread = 360.0 if shell.pattern == "delta" else 180.0
+        if shell.pattern not in ("delta", "star"):
+            raise ValueError(f"unknown Walker pattern: {shell.pattern}")
+
+        plane, slot = np.divmod(np.arange(total), shell.perPlane)
+        inclination.append(np.full(total, float(shell.inclination)))
+        raan.append(spread / shell.planes * plane)
+        meanAnomaly.append((360.0 / shell.perPlane * slot + 360.0 * shell.phasing / total * plane) % 360.0)
+        a = EARTH_RADIUS + shell.altitude
+        meanMotion.append(np.full(total, math.sqrt(MU / a**3) * 86400 / (2 * math.pi)))
+
+    return {
+        "inclination": np.concatenate(inclination),
+        "raan": np.concatenate(raan),
+        "meanAnomaly": np.concatenate(meanAnomaly),
+        "meanMotion": np.concatenate(meanMotion),
+    }
+
+
+def makeSatrecs(shells=DEFAULT_SHELLS, epoch=None, baseNum=10001):
+    """Satrec objects initialized straight from the Walker elements, without TLE text."""
+    epoch = epoch or datetime.now(timezone.utc)
+    epochDays = (epoch - SGP4_EPOCH).total_seconds() / 86400
+    elements = walkerElements(shells)
+
+    satrecs = []
+    for i, (incl, raan, ma, n) in enumerate(
+        zip(*(np.radians(elements[key]) for key in ("inclination", "raan", "meanAnomaly")), elements["meanMotion"])
+    ):
+        satrec = Satrec()
+        # no_kozai ב-rad/min; ecc, argp, bstar ו-ndot אפס כמו בקובץ
+        satrec.sgp4init(WGS72, "i", baseNum + i, epochDays, 0.0, 0.0, 0.0, 0.0, 0.0, incl, ma, n * 2 * math.pi / 1440, raan)
+        satrecs.append(satrec)
+    return satrecs
+
+
+def makeSatellites(ts, shells=DEFAULT_SHELLS, epoch=None, prefix="Ben", baseNum=10001):
+    from skyfield.api import EarthSatellite
+
+    satellites = []
+    for i, satrec in enumerate(makeSatrecs(shells, epoch, baseNum)):
+        sat = EarthSatellite.from_satrec(satrec, ts)
+        sat.name = f"{prefix}-{i + 1}"
+        satellites.append(sat)
+    return satellites
+
+
+@lru_cache(maxsize=16)
+def tleText(shells=DEFAULT_SHELLS, epoch="", prefix="Ben", baseNum=10001):
+    """TLE file text for `shells`; cached per parameter set, `epoch` in YYDDD.DDDDDDDD."""
+    elements = walkerElements(shells)
+    if baseNum + len(elements["raan"]) - 1 > 99999:
+        raise ValueError("TLE files only hold 5 digit catalog numbers")
+    rev_number = 1
+
+    # בונים שורות בפורמט נכון
+    line1 = [
+        f"1 {baseNum + i:05d}U 00000A   {epoch}  .00000000  00000-0  00000-0 0  0000" for i in range(len(elements["raan"]))
+    ]
+    line2 = [
+        f"2 {baseNum + i:05d} {incl:8.4f} {raan:8.4f} 0000000 {0.0:8.4f} {ma:8.4f} {n:11.8f} {rev_number:5d}"
+        for i, (incl, raan, ma, n) in enumerate(
+            zip(elements["inclination"], elements["raan"], elements["meanAnomaly"], elements["meanMotion"])
+        )
+    ]
+
+    # מוסיפים checksum
+    checks1, checks2 = computeChecksums(line1), computeChecksums(line2)
+    return "\n".join(
+        f"{prefix}-{i + 1}\n{l1[:68]}{c1}\n{l2[:68]}{c2}"
+        for i, (l1, c1, l2, c2) in enumerate(zip(line1, checks1, line2, checks2))
+    )
+
+
+def writeTleFile(path, shells=DEFAULT_SHELLS, epoch=None, prefix="Ben"):
+    epoch = epoch or datetime.now(timezone.utc)
+    with open(path, "w") as f:
+        f.write(tleText(tuple(shells), datetime_to_tle_epoch(epoch), prefix))
+
+
+def makeTle(path="tleFiles/constellation.txt", shells=DEFAULT_SHELLS, epoch=None):
+    writeTleFile(path, shells, epoch)
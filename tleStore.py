@@ -0,0 +1,215 @@
+import hashlib
+import os
+import sqlite3
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from sgp4.api import Satrec
+from skyfield.api import EarthSatellite
+
+CELESTRAK_URL = "http://www.celestrak.org/NORAD/elements/gp.php?GROUP={group}&FORMAT=tle"
+GROUPS = {"Gnss": "gnss", "Gps": "gps-ops", "Beidou": "beidou", "Cosmos": "musson"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS groups (
+    name TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    fetched REAL NOT NULL,
+    etag TEXT,
+    lastModified TEXT
+);
+CREATE TABLE IF NOT EXISTS elements (
+    norad INTEGER NOT NULL,
+    epoch REAL NOT NULL,
+    name TEXT NOT NULL,
+    line1 TEXT NOT NULL,
+    line2 TEXT NOT NULL,
+    PRIMARY KEY (norad, epoch)
+);
+CREATE TABLE IF NOT EXISTS members (
+    groupName TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    norad INTEGER NOT NULL,
+    epoch REAL NOT NULL,
+    PRIMARY KEY (groupName, position)
+);
+"""
+
+
+def parseTleText(text):
+    # שורת שם ואחריה שתי שורות TLE (גם בלי שורת שם)
+    lines = [line.rstrip() for line in text.splitlines() if line.strip()]
+    records = []
+    i = 0
+    while i < len(lines):
+        if lines[i].startswith("1 ") and i + 1 < len(lines) and lines[i + 1].startswith("2 "):
+            name, line1, line2 = None, lines[i], lines[i + 1]
+            i += 2
+        elif i + 2 < len(lines) and lines[i + 1].startswith("1 ") and lines[i + 2].startswith("2 "):
+            name, line1, line2 = lines[i].strip(), lines[i + 1], lines[i + 2]
+            i += 3
+        else:
+            i += 1
+            continue
+        records.append((name if name else line1[2:7].strip(), line1, line2))
+    return records
+
+
+class TleStore:
+    """SQLite store of TLE groups with a max-age refresh policy.
+
+    A group is served from disk while it is younger than `maxAge` seconds;
+    after that it is re-downloaded with If-None-Match/If-Modified-Since.
+    When the network is unavailable the last stored copy is used, and an
+    empty store is seeded from the bundled `tleFiles/<group>.txt` files.
+    """
+
+    def __init__(self, ts, path="tleFiles/tleStore.sqlite", maxAge=2 * 3600, urlTemplate=CELESTRAK_URL, groups=GROUPS, timeout=10):
+        self.ts = ts
+        self.path = path
+        self.maxAge = maxAge
+        self.urlTemplate = urlTemplate
+        self.groups = dict(groups)
+        self.timeout = timeout
+        # לוויינים שכבר פוענחו, לפי (קבוצה, hash של השורות השמורות)
+        self.parsed = {}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self.connect() as db:
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def connect(self):
+        db = sqlite3.connect(self.path)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def url(self, choice):
+        return self.urlTemplate.format(group=self.groups[choice])
+
+    def load(self, choice, refresh=None):
+        """Return EarthSatellite objects for a group, refreshing it if stale.
+
+        `refresh=True` forces a conditional download and `refresh=False`
+        never touches the network.
+        """
+        info = self.groupInfo(choice)
+        if refresh or (refresh is None and self.stale(info)):
+            try:
+                self.refresh(choice, info)
+            except (urllib.error.URLError, OSError, ValueError) as error:
+                if info is None and not self.seed(choice):
+                    raise
+                print(f"offline, using stored {choice} TLEs: {error}")
+        elif info is None and not self.seed(choice):
+            raise LookupError(f"no stored TLEs for {choice}")
+
+        # תשובת 304 מעדכנת רק את זמן ההורדה, אז המפתח הוא התוכן ולא הזמן
+        records = self.records(choice)
+        digest = hashlib.sha1("\n".join("\n".join(record) for record in records).encode()).hexdigest()
+        key = (choice, digest)
+        if key not in self.parsed:
+            self.parsed = {k: v for k, v in self.parsed.items() if k[0] != choice}
+            self.parsed[key] = [EarthSatellite(line1, line2, name, self.ts) for name, line1, line2 in records]
+        return self.parsed[key]
+
+    def loadMerged(self, choices=None, refresh=False):
+        """All satellites of several groups, one per NORAD id (the newest epoch wins)."""
+        merged = {}
+        for choice in self.groups if choices is None else choices:
+            try:
+                satellites = self.load(choice, refresh)
+            except LookupError:
+                continue
+            for sat in satellites:
+                old = merged.get(sat.model.satnum)
+                if old is None or sat.epoch.tt > old.epoch.tt:
+                    merged[sat.model.satnum] = sat
+        if not merged:
+            raise LookupError("no stored TLEs")
+        return list(merged.values())
+
+    def stale(self, info):
+        return info is None or time.time() - info["fetched"] > self.maxAge
+
+    def groupInfo(self, choice):
+        with self.connect() as db:
+            row = db.execute("SELECT url, fetched, etag, lastModified FROM groups WHERE name = ?", (choice,)).fetchone()
+        if row is None:
+            return None
+        return {"url": row[0], "fetched": row[1], "etag": row[2], "lastModified": row[3]}
+
+    def records(self, choice):
+        with self.connect() as db:
+            return db.execute(
+                "SELECT e.name, e.line1, e.line2 FROM members m "
+                "JOIN elements e ON e.norad = m.norad AND e.epoch = m.epoch "
+                "WHERE m.groupName = ? ORDER BY m.position",
+                (choice,),
+            ).fetchall()
+
+    def conditionalHeaders(self, url, info):
+        # ETag ו-Last-Modified מההורדה הקודמת, רק אם היא הייתה מאותה כתובת
+        headers = {}
+        if info is not None and info["url"] == url:
+            if info["etag"]:
+                headers["If-None-Match"] = info["etag"]
+            if info["lastModified"]:
+                headers["If-Modified-Since"] = info["lastModified"]
+        return headers
+
+    def refresh(self, choice, info=None):
+        url = self.url(choice)
+        request = urllib.request.Request(url, headers=self.conditionalHeaders(url, info))
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                text = response.read().decode("utf-8", errors="replace")
+                etag, lastModified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        except urllib.error.HTTPError as error:
+            if error.code != 304:
+                raise
+            self.notModified(choice)
+            return False
+
+        self.update(choice, url, text, etag, lastModified)
+        return True
+
+    def notModified(self, choice):
+        with self.connect() as db:
+            db.execute("UPDATE groups SET fetched = ? WHERE name = ?", (time.time(), choice))
+
+    def update(self, choice, url, text, etag, lastModified):
+        records = parseTleText(text)
+        if not records:
+            raise ValueError(f"no TLEs in response from {url}")
+        self.store(choice, url, records, time.time(), etag, lastModified)
+
+    def seed(self, choice):
+        path = f"tleFiles/{choice}.txt"
+        if not os.path.exists(path):
+            return False
+        with open(path, encoding="utf-8") as f:
+            records = parseTleText(f.read())
+        # זמן הורדה 0: העותק המצורף תמיד ישן, כך שבחיבור הבא לרשת הקבוצה תתרענן
+        self.store(choice, self.url(choice), records, 0.0, None, None)
+        return True
+
+    def store(self, choice, url, records, fetched, etag, lastModified):
+        rows = []
+        for name, line1, line2 in records:
+            satrec = Satrec.twoline2rv(line1, line2)
+            rows.append((satrec.satnum, satrec.jdsatepoch + satrec.jdsatepochF, name, line1, line2))
+
+        with self.connect() as db:
+            db.executemany("INSERT OR REPLACE INTO elements VALUES (?, ?, ?, ?, ?)", rows)
+            db.execute("DELETE FROM members WHERE groupName = ?", (choice,))
+            db.executemany(
+                "INSERT INTO members VALUES (?, ?, ?, ?)", [(choice, i, norad, epoch) for i, (norad, epoch, *rest) in enumerate(rows)]
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO groups VALUES (?, ?, ?, ?, ?)", (choice, url, fetched, etag, lastModified)
+            )
@@ -0,0 +1,104 @@
+from tkinter import ttk
+
+
+class VirtualTable:
+    """A ttk.Treeview that only materializes the rows currently on screen.
+
+    The table owns a fixed pool of Treeview items, one per visible line.
+    Scrolling moves `offset` and rewrites those items from `rowValues(i)`
+    and `rowTags(i)`, so cost per frame depends on the window height and
+    not on how many rows the model has. `render` diffs against the rows
+    already shown and only touches items whose values or tags changed, so
+    rendering an unchanged model makes no Tk calls at all.
+    """
+
+    def __init__(self, parent, columns, rowValues, rowTags, rowHeight=20):
+        self.rowValues = rowValues
+        self.rowTags = rowTags
+        self.rowHeight = rowHeight
+        self.count = 0
+        self.offset = 0
+        self.visibleRows = 1
+        # מה שמוצג כרגע בכל פריט, (values, tags), וגם מצב פס הגלילה
+        self.shown = []
+        self.scrollState = None
+
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=columns, show="headings", selectmode="none")
+        for col in columns:
+            self.tree.heading(col, text=col)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.onScroll)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.tree.bind("<Configure>", self.onResize)
+        self.tree.bind("<MouseWheel>", lambda event: self.scrollBy(-1 if event.delta > 0 else 1))
+        self.tree.bind("<Button-4>", lambda event: self.scrollBy(-1))
+        self.tree.bind("<Button-5>", lambda event: self.scrollBy(1))
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def setCount(self, count):
+        self.count = count
+        self.offset = max(0, min(self.offset, count - self.visibleRows))
+        self.render()
+
+    def render(self):
+        shown = max(0, min(self.visibleRows, self.count - self.offset))
+        rows = [(tuple(self.rowValues(self.offset + i)), tuple(self.rowTags(self.offset + i))) for i in range(shown)]
+
+        # רק ההפרש במספר השורות הגלויות נוסף או נמחק
+        if len(self.shown) != shown:
+            items = self.tree.get_children()
+            if len(items) > shown:
+                self.tree.delete(*items[shown:])
+            for i in range(len(items), shown):
+                self.tree.insert("", "end")
+            self.shown = self.shown[:shown]
+
+        # ורק שורות שהתוכן או הצבע שלהן השתנה נכתבות מחדש
+        items = None
+        for i, row in enumerate(rows):
+            if i < len(self.shown) and self.shown[i] == row:
+                continue
+            if items is None:
+                items = self.tree.get_children()
+            values, tags = row
+            self.tree.item(items[i], values=values, tags=tags)
+        self.shown = rows
+
+        scrollState = (self.offset / self.count, (self.offset + shown) / self.count) if self.count else (0, 1)
+        if scrollState != self.scrollState:
+            self.scrollState = scrollState
+            self.scrollbar.set(*scrollState)
+
+    def indexOf(self, item):
+        if not item:
+            return None
+        return self.offset + self.tree.index(item)
+
+    def scrollTo(self, offset):
+        offset = max(0, min(int(offset), self.count - self.visibleRows))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def scrollBy(self, rows):
+        self.scrollTo(self.offset + rows)
+        return "break"
+
+    def onScroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scrollTo(float(amount) * self.count)
+        elif unit == "pages":
+            self.scrollBy(int(amount) * self.visibleRows)
+        else:
+            self.scrollBy(int(amount))
+
+    def onResize(self, event):
+        # שורת הכותרת תופסת בערך שורה אחת
+        rows = max(1, event.height // self.rowHeight - 1)
+        if rows != self.visibleRows:
+            self.visibleRows = rows
+            self.setCount(self.count)
@@ -1,38 +1,68 @@
 import csv
+import numpy as np
 from skyfield.api import load, wgs84
 from datetime import datetime, timezone
+from propagation import propagateSatellites
+from resultWriter import ColumnWriter, outputFormat
+from sharedTime import timescale
 
 
-def calcVisibleSats(lat, lon, minElevation, maxElevation):
+def calcVisibleSats(lat, lon, minElevation, maxElevation, workers=None, progress=None, output="visibleSats.csv", satellites=None):
+    """Visible satellites per minute of today; `satellites` defaults to the bundled tleFiles/Gps.txt."""
+    progress = progress or (lambda text: None)
     user = wgs84.latlon(lat, lon)
 
-    satellites = load.tle_file("/Users/benbaron/Desktop/tle/tleFiles/GPS.txt")
-    ts = load.timescale()
+    ts = timescale()
+    if satellites is None:
+        satellites = load.tle_file("tleFiles/Gps.txt", ts=ts)
 
-    allVisibleSats = []
     now = datetime.now(timezone.utc)
+    # כל דקות היום במערך זמן אחד
+    times = ts.utc(now.year, now.month, now.day, 0, range(24 * 60), 0)
 
-    for hour in range(24):
-        for minute in range(60):
-            t = ts.utc(now.year, now.month, now.day, hour, minute, 0)
-            visibleSats = []
-            for sat in satellites:
-                difference = sat - user
-                topocentric = difference.at(t)
-                alt, az, distance = topocentric.altaz()
-                if alt.degrees >= minElevation and alt.degrees <= maxElevation:
-                    visibleSats.append(sat.name)
-
-            allVisibleSats.append(
-                {"time": f"{hour:02d}:{minute:02d}", "numVisible": len(visibleSats), "sats": ", ".join(visibleSats)}
-            )
-
-    with open("visibleSats.csv", "w", newline="", encoding="utf-8") as csvfile:
+    progress(f"propagating {len(satellites)} satellites")
+    visible = calcVisibilityMask(satellites, user, times, minElevation, maxElevation, workers)
+    names = np.array([sat.name for sat in satellites], dtype=object)
+
+    progress(f"writing {output}")
+    if outputFormat(output) != "csv":
+        # פורמט עמודות: שורה לכל זוג (דקה, לוויין) נראה, שמות הלוויינים במילון
+        day = datetime(now.year, now.month, now.day, tzinfo=timezone.utc).timestamp()
+        satIndex, minuteIndex = np.nonzero(visible)
+        order = np.argsort(minuteIndex, kind="stable")
+        with ColumnWriter(output, [("time", np.int64), ("sat", np.int32)], {"sat": names.tolist()}) as writer:
+            writer.write(time=day + 60 * minuteIndex[order], sat=satIndex[order])
+        print(f"file made successful: {output}")
+        return
+
+    with open(output, "w", newline="", encoding="utf-8") as csvfile:
         fieldnames = ["time", "numVisible", "sats"]
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
 
         writer.writeheader()
-        for row in allVisibleSats:
-            writer.writerow(row)
+        for i in range(len(times)):
+            hour, minute = divmod(i, 60)
+            visibleSats = names[visible[:, i]]
+            writer.writerow({"time": f"{hour:02d}:{minute:02d}", "numVisible": len(visibleSats), "sats": ", ".join(visibleSats)})
 
     print(f"file made successful: {csvfile.name}")
+
+
+def calcElevations(satellites, user, times, workers=None):
+    with propagateSatellites(satellites, times, workers=workers) as positions:
+        return elevationsFrom(positions.array, user)
+
+
+def elevationsFrom(satPos, user):
+    lat, lon = user.latitude.radians, user.longitude.radians
+    up = np.array([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+    difference = satPos - user.itrs_xyz.km
+
+    # זווית הגובה מעל האופק המקומי -> (sats, times)
+    distance = np.linalg.norm(difference, axis=-1)
+    return np.degrees(np.arcsin(difference @ up / distance))
+
+
+def calcVisibilityMask(satellites, user, times, minElevation, maxElevation, workers=None):
+    elevations = calcElevations(satellites, user, times, workers)
+    return (elevations >= minElevation) & (elevations <= maxElevation)